@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import copy
+import sys
+
+from ansible.plugins.action.normal import ActionModule as _ActionModule
+
+try:
+    from __main__ import display
+except ImportError:
+    from ansible.utils.display import Display
+    display = Display()
+
+
+class ActionModule(_ActionModule):
+    '''
+    Action plugin for every mt_* module (enabled by adding mt to
+    network_group_modules in ansible.cfg).
+
+    With connection: routeros_api it starts, or reuses, the persistent
+    RouterOS API session for the host and hands its socket to the module,
+    which then sends its commands through it instead of logging in again.
+    '''
+
+    def run(self, tmp=None, task_vars=None):
+        if self._play_context.connection == 'routeros_api':
+            socket_path = self._start_connection()
+            if not socket_path:
+                return {'failed': True,
+                        'msg': 'unable to start the persistent RouterOS '
+                               'API connection'}
+            task_vars['ansible_socket'] = socket_path
+
+        return super(ActionModule, self).run(tmp, task_vars)
+
+    def _start_connection(self):
+        args = self._task.args
+        pc = copy.deepcopy(self._play_context)
+        if args.get('hostname'):
+            pc.remote_addr = args['hostname']
+        if 'username' in args:
+            pc.remote_user = args['username']
+        if 'password' in args:
+            pc.password = args['password']
+
+        display.vvv('using connection plugin %s' % pc.connection, pc.remote_addr)
+        connection = self._shared_loader_obj.connection_loader.get(
+            'persistent', pc, sys.stdin)
+        socket_path = connection.run()
+        display.vvvv('socket_path: %s' % socket_path, pc.remote_addr)
+        return socket_path
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+    connection: routeros_api
+    short_description: Persistent RouterOS API session for the mt_* modules
+    description:
+        - Modules are executed locally, like with network_cli, and send their
+          API commands through one authenticated RouterOS API session per
+          host that ansible-connection keeps open across tasks.
+        - Host, port, user and password come from the play context; the
+          mt action plugin fills them from the hostname, username and
+          password module arguments.
+    version_added: "2.4"
+"""
+
+import json
+from functools import wraps
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import ansible.module_utils
+from ansible import constants as C
+from ansible.module_utils._text import to_bytes, to_native, to_text
+from ansible.plugins.connection.local import Connection as LocalConnection
+from ansible.utils.jsonrpc import Rpc
+
+# mt_api lives in the configured module_utils path, which the controller
+# does not import from by itself
+for path in C.DEFAULT_MODULE_UTILS_PATH:
+    if path not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.append(path)
+
+from ansible.module_utils import mt_api  # noqa: E402
+
+
+def reports_connection_errors(method):
+    """Answer a router that cannot be reached with a json-rpc error whose
+    data says so, for PersistentSession to raise RosAPIConnectionError
+    rather than the RosAPIError of a refused command or login."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        except (mt_api.RosAPIConnectionError, mt_api.RosAPIFatalError) as e:
+            return self.connection.internal_error(
+                data={'message': to_text(e), 'connection': True})
+    return wrapper
+
+
+class RouterosApi(object):
+    """Methods mt_api.PersistentSession calls over json-rpc."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @reports_connection_errors
+    def open(self):
+        return self.connection.session().connections
+
+    @reports_connection_errors
+    def talk(self, words, timeout=None):
+        session = self.connection.session()
+        return self._to_replies(
+            session.talk(self._to_words(words), timeout))
+
+    @reports_connection_errors
+    def talk_many(self, sentences):
+        session = self.connection.session()
+        results = session.talk_many(
+            [self._to_words(words) for words in sentences])
+        return [self._to_replies(replies) for replies in results]
+
+    @reports_connection_errors
+    def pipeline(self, sentences, window=64):
+        session = self.connection.session()
+        results = session.talk_pipelined(
+            [self._to_words(words) for words in sentences], window)
+        return [self._to_result(result) for result in results]
+
+    @classmethod
+    def _to_result(cls, result):
+        if isinstance(result, (mt_api.RosAPIConnectionError,
+                               mt_api.RosAPIFatalError)):
+            # the session dropped before this command was answered
+            return {'dropped': to_text(result)}
+        if isinstance(result, mt_api.RosAPIError):
+            return {'trap': cls._to_trap(result)}
+        return cls._to_replies(result)
+
+    @staticmethod
+    def _to_trap(error):
+        if isinstance(error.value, Mapping):
+            return dict((to_text(k), to_text(v))
+                        for k, v in error.value.items())
+        return {'message': to_text(error)}
+
+    @staticmethod
+    def _to_words(words):
+        return [to_bytes(word, errors='surrogate_or_strict') for word in words]
+
+    @staticmethod
+    def _to_replies(replies):
+        return [(to_text(reply), dict((to_text(k), to_text(v))
+                                      for k, v in attrs.items()))
+                for reply, attrs in replies]
+
+
+class Connection(Rpc, LocalConnection):
+    ''' RouterOS API connection, modules run locally '''
+
+    transport = 'routeros_api'
+    has_pipelining = True
+
+    def __init__(self, play_context, new_stdin, *args, **kwargs):
+        super(Connection, self).__init__(play_context, new_stdin, *args, **kwargs)
+        self._mikrotik = None
+        self._rpc.add(RouterosApi(self))
+
+    def _connect(self):
+        # unlike LocalConnection._connect(), keep remote_user: it is the
+        # router account the mt action plugin set, not the local OS user
+        self._connected = True
+        return self
+
+    def session(self):
+        """The API session, opened on the first command it is asked for.
+
+        Only ansible-connection sends commands, so the task workers, which
+        just run modules locally through this plugin, never log in.
+        """
+        if self._mikrotik is None:
+            pc = self._play_context
+            mikrotik = mt_api.Mikrotik(
+                to_native(pc.remote_addr),
+                to_bytes(pc.remote_user or '', errors='surrogate_or_strict'),
+                to_bytes(pc.password or '', errors='surrogate_or_strict'),
+                port=int(pc.port or 8728),
+            )
+            mikrotik.login()
+            self._mikrotik = mikrotik
+        return self._mikrotik
+
+    def exec_command(self, cmd, in_data=None, sudoable=True):
+        try:
+            request = json.loads(to_text(cmd, errors='surrogate_or_strict'))
+        except (ValueError, TypeError):
+            request = None
+        if isinstance(request, dict) and 'jsonrpc' in request:
+            return 0, to_bytes(self._exec_rpc(request)), b''
+        return super(Connection, self).exec_command(cmd, in_data, sudoable)
+
+    def close(self):
+        if self._mikrotik is not None:
+            self._mikrotik.close()
+            self._mikrotik = None
+        super(Connection, self).close()
@@ -66,7 +66,8 @@ def main():
   changed = False
   changed_message = []
 
-  mk = mt_api.Mikrotik(hostname, username, password)
+  mk = mt_api.Mikrotik(hostname, username, password,
+                       socket_path=module._socket_path)
   try:
     mk.login()
   except:
@@ -98,6 +98,7 @@ def main():
         idempotent_param = idempotent_parameter,
         api_path         = '/ip/' + str(params['parameter']),
         check_mode       = module.check_mode,
+        socket_path      = module._socket_path,
 
     )
 
@@ -105,7 +106,8 @@ def main():
 
     if mt_obj.failed:
         module.fail_json(
-          msg = mt_obj.failed_msg
+          msg = mt_obj.failed_msg,
+          **mt_obj.perf_result()
         )
     elif mt_obj.changed:
         module.exit_json(
@@ -116,6 +118,7 @@ def main():
                 "old": mt_obj.old_params,
                 "new": mt_obj.new_params,
             }},
+            **mt_obj.perf_result()
         )
     else:
         module.exit_json(
@@ -123,6 +126,7 @@ def main():
             changed=False,
             #msg='',
             msg=params['settings'],
+            **mt_obj.perf_result()
         )
 
 if __name__ == '__main__':
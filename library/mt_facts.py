@@ -110,11 +110,12 @@ from ansible.module_utils.basic import AnsibleModule
 
 class MikrotikFacts(object):
 
-    def __init__(self, hostname, username, password):
+    def __init__(self, hostname, username, password, socket_path=None):
 
         self.hostname = hostname
         self.username = username
         self.password = password
+        self.socket_path = socket_path
         self.login_success = False
         self.current_params = {}
         self.mk = None
@@ -143,6 +144,7 @@ class MikrotikFacts(object):
             self.hostname,
             self.username,
             self.password,
+            socket_path=self.socket_path,
           )
         try:
             self.mk.login()
@@ -171,7 +173,8 @@ def main():
     )
 
     params = module.params
-    device = MikrotikFacts(params['hostname'], params['username'], params['password'])
+    device = MikrotikFacts(params['hostname'], params['username'], params['password'],
+                           socket_path=module._socket_path)
     mt_facts = device.run()
     mt_facts_result = dict(changed=False, ansible_facts=mt_facts)
     module.exit_json(**mt_facts_result)
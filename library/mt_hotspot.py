@@ -96,6 +96,7 @@ def main():
         idempotent_param = idempotent_parameter,
         api_path         = '/ip/' + str(params['parameter']),
         check_mode       = module.check_mode,
+        socket_path      = module._socket_path,
 
     )
 
@@ -103,7 +104,8 @@ def main():
 
     if mt_obj.failed:
         module.fail_json(
-          msg = mt_obj.failed_msg
+          msg = mt_obj.failed_msg,
+          **mt_obj.perf_result()
         )
     elif mt_obj.changed:
         module.exit_json(
@@ -114,6 +116,7 @@ def main():
                 "old": mt_obj.old_params,
                 "new": mt_obj.new_params,
             }},
+            **mt_obj.perf_result()
         )
     else:
         module.exit_json(
@@ -121,6 +124,7 @@ def main():
             changed=False,
             #msg='',
             msg=params['settings'],
+            **mt_obj.perf_result()
         )
 
 if __name__ == '__main__':
@@ -108,13 +108,15 @@ def main():
     desired_params   = params['settings'],
     idempotent_param = idempotent_parameter,
     api_path         = '/interface/' + str(params['parameter']),
-    check_mode       = module.check_mode
+    check_mode       = module.check_mode,
+    socket_path      = module._socket_path
   )
 
   # exit if login failed
   if not mt_obj.login_success:
     module.fail_json(
-      msg = mt_obj.failed_msg
+      msg = mt_obj.failed_msg,
+      **mt_obj.perf_result()
     )
 
   # add, remove or edit things
@@ -122,7 +124,8 @@ def main():
 
   if mt_obj.failed:
       module.fail_json(
-        msg = mt_obj.failed_msg
+        msg = mt_obj.failed_msg,
+        **mt_obj.perf_result()
       )
   elif mt_obj.changed:
     module.exit_json(
@@ -133,6 +136,7 @@ def main():
           "old": mt_obj.old_params,
           "new": mt_obj.new_params,
       }},
+      **mt_obj.perf_result()
     )
   else:
     module.exit_json(
@@ -140,6 +144,7 @@ def main():
       changed=False,
       #msg='',
       msg=params['settings'],
+      **mt_obj.perf_result()
     )
 
 if __name__ == '__main__':
@@ -126,13 +126,15 @@ def main():
     desired_params   = params['settings'],
     idempotent_param = params['idempotent'],
     api_path         = '/ip/address',
-    check_mode       = module.check_mode
+    check_mode       = module.check_mode,
+    socket_path      = module._socket_path
   )
 
   # exit if login failed
   if not mt_obj.login_success:
     module.fail_json(
-      msg = mt_obj.failed_msg
+      msg = mt_obj.failed_msg,
+      **mt_obj.perf_result()
     )
 
   # add, remove or edit things
@@ -140,7 +142,8 @@ def main():
 
   if mt_obj.failed:
       module.fail_json(
-        msg = mt_obj.failed_msg
+        msg = mt_obj.failed_msg,
+        **mt_obj.perf_result()
       )
   elif mt_obj.changed:
     module.exit_json(
@@ -151,6 +154,7 @@ def main():
           "old": mt_obj.old_params,
           "new": mt_obj.new_params,
       }},
+      **mt_obj.perf_result()
     )
   else:
     module.exit_json(
@@ -158,6 +162,7 @@ def main():
       changed=False,
       #msg='',
       msg=params['settings'],
+      **mt_obj.perf_result()
     )
 
 if __name__ == '__main__':
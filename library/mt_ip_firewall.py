@@ -108,7 +108,8 @@ def main():
   changed = False
   msg = ""
 
-  mk = mt_api.Mikrotik(hostname, username, password)
+  mk = mt_api.Mikrotik(hostname, username, password,
+                       socket_path=module._socket_path)
   try:
     mk.login()
   except:
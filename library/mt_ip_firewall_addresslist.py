@@ -51,6 +51,24 @@ from ansible.module_utils import mt_api
 from ansible.module_utils.basic import AnsibleModule
 
 
+def fail_items(module, action, failed_items):
+  module.fail_json(
+    msg="Could not %s %d entries: %s" % (action, len(failed_items), ", ".join(
+      "%s (%s)" % (address, error) for address, error in failed_items)),
+  )
+
+
+def remove_addresses(module, mk, address_list_path, addresses, address_ids):
+  # the removes are pipelined, a trap only fails its own entry
+  addresses_by_id = dict((address_ids[a], a) for a in addresses)
+  failed_items = mk.api_remove_many(
+    address_list_path, [address_ids[a] for a in addresses])
+  if failed_items:
+    fail_items(module, "remove", [
+      (addresses_by_id[remove_id], error)
+      for remove_id, error in failed_items])
+
+
 def main():
 
   module = AnsibleModule(
@@ -81,7 +99,8 @@ def main():
   msg = ""
 
   address_list_path = '/ip/firewall/address-list'
-  mk = mt_api.Mikrotik(hostname, username, password)
+  mk = mt_api.Mikrotik(hostname, username, password,
+                       socket_path=module._socket_path)
   try:
     mk.login()
   except:
@@ -135,17 +154,22 @@ def main():
         temp_dict['comment'] = item['comment']
         add_list.append(dict(temp_dict))
 
+    # the adds are pipelined, a trap only fails its own entry
+    add_dictionaries = []
     for i in add_list:
       #address = i['address']
       #comment = i['comment']
-      add_dictionary = {
+      add_dictionaries.append({
         "address": i['address'],
         "list": list_name,
         "comment": i['comment']
-      }
-      if not check_mode:
-        mk.api_add(address_list_path, add_dictionary)
+      })
       changed = True
+    if add_dictionaries and not check_mode:
+      failed_items = mk.api_add_many(address_list_path, add_dictionaries)
+      if failed_items:
+        fail_items(module, "add", [
+          (item['address'], error) for item, error in failed_items])
 
     #####################
     # build remove list
@@ -157,21 +181,20 @@ def main():
     #######################################
     # Remove every item in the address_list
     #######################################
-    for i in remove_list:
-      remove_id = mikrotik_address_id[i]
+    if remove_list:
+      changed = True
       if not check_mode:
-        mk.api_remove(address_list_path, remove_id)
-      if not changed:
-        changed = True
+        remove_addresses(module, mk, address_list_path, remove_list,
+                         mikrotik_address_id)
   else:
     #######################################
     # Remove every item
     #######################################
-    for remove_id in mikrotik_address_id.values():
+    if mikrotik_address_id:
+      changed = True
       if not check_mode:
-        mk.api_remove(address_list_path, remove_id)
-      if not changed:
-        changed = True
+        remove_addresses(module, mk, address_list_path,
+                         list(mikrotik_address_id), mikrotik_address_id)
 
   if changed:
     module.exit_json(
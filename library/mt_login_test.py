@@ -1,5 +1,4 @@
 #! /usr/bin/python
-import socket
 from ansible.module_utils import mt_api
 
 from ansible.module_utils.basic import AnsibleModule
@@ -21,19 +20,17 @@ def main():
   changed = False
   msg = ""
 
-  mk = mt_api.Mikrotik(hostname,username,password)
-  sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-  result = sock.connect_ex((hostname, 8728))
-  if result == 0:
-    try:
-      mk.login()
-    except:
+  mk = mt_api.Mikrotik(hostname,username,password,
+                       socket_path=module._socket_path)
+  try:
+    mk.login()
+  except mt_api.RosAPIConnectionError:
       module.fail_json(
-        msg="Could not log into Mikrotik device.  Check the username and password."
+        msg="Could not access RouterOS api." + " Verify API service is enabled and not blocked by firewall."
       )
-  else:
+  except:
       module.fail_json(
-        msg="Could not access RouterOS api." + " Verify API service is enabled and not blocked by firewall."
+        msg="Could not log into Mikrotik device.  Check the username and password."
       )
 
 
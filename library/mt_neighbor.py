@@ -88,14 +88,16 @@ def main():
     desired_params   = params['settings'],
     idempotent_param = idempotent_parameter,
     api_path         = '/ip/neighbor/' + str(params['parameter']),
-    check_mode       = module.check_mode
+    check_mode       = module.check_mode,
+    socket_path      = module._socket_path
   )
 
   mt_obj.sync_state()
 
   if mt_obj.failed:
     module.fail_json(
-      msg = mt_obj.failed_msg
+      msg = mt_obj.failed_msg,
+      **mt_obj.perf_result()
     )
   elif mt_obj.changed:
     module.exit_json(
@@ -106,6 +108,7 @@ def main():
         "old": mt_obj.old_params,
         "new": mt_obj.new_params,
       }},
+      **mt_obj.perf_result()
     )
   else:
     module.exit_json(
@@ -113,6 +116,7 @@ def main():
       changed=False,
       #msg='',
       msg=params['settings'],
+      **mt_obj.perf_result()
     )
 
 if __name__ == '__main__':
@@ -74,14 +74,16 @@ def main():
     desired_params   = params['settings'],
     idempotent_param = 'name',
     api_path         = '/ppp/profile',
-    check_mode      = module.check_mode
+    check_mode      = module.check_mode,
+    socket_path     = module._socket_path
   )
 
   mt_obj.sync_state()
 
   if mt_obj.failed:
     module.fail_json(
-      msg = mt_obj.failed_msg
+      msg = mt_obj.failed_msg,
+      **mt_obj.perf_result()
     )
   elif mt_obj.changed:
     module.exit_json(
@@ -92,6 +94,7 @@ def main():
         "old": mt_obj.old_params,
         "new": mt_obj.new_params,
       }},
+      **mt_obj.perf_result()
     )
   else:
     module.exit_json(
@@ -99,6 +102,7 @@ def main():
       changed=False,
       #msg='',
       msg=params['settings'],
+      **mt_obj.perf_result()
     )
 
 if __name__ == '__main__':
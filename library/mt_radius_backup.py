@@ -123,7 +123,8 @@ def main():
   msg = ""
 
   radius_path = '/radius'
-  mk = mt_api.Mikrotik(hostname, username, password)
+  mk = mt_api.Mikrotik(hostname, username, password,
+                       socket_path=module._socket_path)
   try:
     mk.login()
   except:
@@ -1,46 +1,125 @@
 from __future__ import unicode_literals
 
+import array
 import binascii
+import collections
 import hashlib
-import logging
+import json
+import select
 import socket
 import ssl
-import sys
-
+import struct
+import time
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils._text import to_native
+from ansible.module_utils._text import to_text
+from ansible.module_utils.connection import recv_data
+from ansible.module_utils.connection import request_builder
+from ansible.module_utils.connection import send_data
+from ansible.module_utils.mt_api.circuit_breaker import CircuitBreaker
+from ansible.module_utils.mt_api.host_cache import HostCache
+from ansible.module_utils.mt_api.metrics import Metrics
+from ansible.module_utils.mt_api.query import Query
 from ansible.module_utils.mt_api.retryloop import RetryError
 from ansible.module_utils.mt_api.retryloop import retryloop
+from ansible.module_utils.mt_api.rows import Replies
+from ansible.module_utils.mt_api.rows import Rows
+from ansible.module_utils.mt_api.socket_utils import connect
 from ansible.module_utils.mt_api.socket_utils import set_keepalive
-
-PY2 = sys.version_info[0] < 3
-logger = logging.getLogger(__name__)
+from ansible.module_utils.mt_api.socket_utils import set_nodelay
+from ansible.module_utils.mt_api.ssl_utils import API_SSL_PORT
+from ansible.module_utils.mt_api.ssl_utils import remember_session
+from ansible.module_utils.mt_api.ssl_utils import wrap_socket
+from ansible.module_utils.mt_api.wire_trace import WireTrace
 
 
 class RosAPIError(Exception):
     def __init__(self, value):
         self.value = value
+        # the last sentences on the wire, when tracing is on
+        self.trace = None
 
     def __str__(self):
-        if isinstance(self.value, dict) and self.value.get('message'):
-            return self.value['message']
+        message = None
+        if isinstance(self.value, Mapping):
+            # traps split by parse_sentence() have bytes keys
+            message = (self.value.get('message') or
+                       self.value.get(b'message'))
+        if message:
+            message = to_native(message)
         elif isinstance(self.value, list):
             elements = (
                 '%s: %s' %
                 (element.__class__, str(element)) for element in self.value
             )
-            return '[%s]' % (', '.join(element for element in elements))
+            message = '[%s]' % (', '.join(element for element in elements))
         else:
-            return str(self.value)
+            message = str(self.value)
+        if self.trace:
+            message += '\nwire trace:\n' + '\n'.join(self.trace)
+            return to_native(message, errors='surrogate_or_replace')
+        return message
 
 
 class RosAPIConnectionError(RosAPIError):
-    pass
+    # set when not a byte of the command was sent, so it was not run
+    unsent = False
 
 
 class RosAPIFatalError(RosAPIError):
     pass
 
 
+class RosAPITimeoutError(RosAPIError):
+    """No reply in time. The command was cancelled and, unless the cancel
+    timed out too, the session is still usable."""
+
+
+def check_circuit(breaker, host, port):
+    """Raise RosAPIConnectionError while the circuit of host is open."""
+    if not breaker.allow(host, port):
+        raise RosAPIConnectionError(
+            '%s:%s failed to connect %d times in a row, not trying again '
+            'for %d seconds' % (host, port, breaker.threshold,
+                                breaker.retry_in(host, port)))
+
+
 class RosApiLengthUtils(object):
+    """Codec for the length prefix of every word.
+
+    RouterOS encodes a length in 1 to 5 bytes, the high bits of the first
+    byte telling how many follow:
+
+        0xxxxxxx                                   < 0x80
+        10xxxxxx xxxxxxxx                          < 0x4000
+        110xxxxx xxxxxxxx xxxxxxxx                 < 0x200000
+        1110xxxx xxxxxxxx xxxxxxxx xxxxxxxx        < 0x10000000
+        11110000 xxxxxxxx xxxxxxxx xxxxxxxx xxxxxxxx
+    """
+
+    # most words are shorter than 0x80 bytes, their one byte length
+    # prefixes are built once instead of for every word
+    short_lengths = tuple(bytes(bytearray([i])) for i in range(0x80))
+
+    # first byte of a length -> (number of bytes following, its own bits),
+    # None for the control bytes 0xF1 and above which are not lengths
+    prefixes = tuple(
+        (0, i) if i < 0x80 else
+        (1, i & 0x3F) if i < 0xC0 else
+        (2, i & 0x1F) if i < 0xE0 else
+        (3, i & 0x0F) if i < 0xF0 else
+        (4, 0) if i == 0xF0 else
+        None
+        for i in range(0x100))
+
+    uint32 = struct.Struct('>I')
+
     def __init__(self, api):
         self.api = api
 
@@ -49,124 +128,708 @@ class RosApiLengthUtils(object):
 
     def length_to_bytes(self, length):
         if length < 0x80:
-            return self.to_bytes(length)
+            return self.short_lengths[length]
         elif length < 0x4000:
-            length |= 0x8000
-            return self.to_bytes(length, 2)
+            return self.uint32.pack(length | 0x8000)[2:]
         elif length < 0x200000:
-            length |= 0xC00000
-            return self.to_bytes(length, 3)
+            return self.uint32.pack(length | 0xC00000)[1:]
         elif length < 0x10000000:
-            length |= 0xE0000000
-            return self.to_bytes(length, 4)
+            return self.uint32.pack(length | 0xE0000000)
         else:
-            return self.to_bytes(0xF0) + self.to_bytes(length, 4)
+            return b'\xf0' + self.uint32.pack(length)
 
     def read_length(self):
-        b = self.api.read_bytes(1)
-        i = self.from_bytes(b)
-        if (i & 0x80) == 0x00:
-            return i
-        elif (i & 0xC0) == 0x80:
-            return self._unpack(1, i & ~0xC0)
-        elif (i & 0xE0) == 0xC0:
-            return self._unpack(2, i & ~0xE0)
-        elif (i & 0xF0) == 0xE0:
-            return self._unpack(3, i & ~0xF0)
-        elif (i & 0xF8) == 0xF0:
-            return self.from_bytes(self.api.read_bytes(1))
+        return self.decode_length(self.api.read_bytes)
+
+    @classmethod
+    def decode_length(cls, read):
+        """Decode the next length, read(n) returning the next n bytes."""
+        first = bytearray(read(1))[0]
+        prefix = cls.prefixes[first]
+        if prefix is None:
+            raise RosAPIFatalError('Unknown value: %x' % first)
+        following, high = prefix
+        if not following:
+            return high
+        low = cls.uint32.unpack(read(following).rjust(4, b'\x00'))[0]
+        return high << (8 * following) | low
+
+
+LOGIN_METHODS = ('plain', 'md5')
+
+
+def login_steps(username, pwd, method=None):
+    """The /login conversation, shared by RosAPI and the asyncio client.
+
+    A generator yielding each sentence to send; the replies to it are
+    passed back in with send() and a !trap with throw(). Once logged in it
+    yields the name of the method that worked, for the caller to remember
+    and pass back as method next time.
+
+    RouterOS 6.43 and later take the password in the first /login, saving
+    a round trip. Older versions ignore it and answer with the MD5
+    challenge instead, so trying 'plain' first costs them nothing. If the
+    first method is refused outright, or the bare /login of 'md5' gets no
+    challenge back, the other one is tried once.
+    """
+    order = LOGIN_METHODS[::-1] if method == 'md5' else LOGIN_METHODS
+    refused = None
+    for name in order:
+        try:
+            if name == 'plain':
+                replies = yield [b'/login', b'=name=' + username,
+                                 b'=password=' + pwd]
+            else:
+                replies = yield [b'/login']
+        except RosAPIError as e:
+            if name == order[-1]:
+                raise
+            refused = e
+            continue
+        token = None
+        for _, attrs in replies:
+            token = attrs.get(b'ret', token)
+        if token is None and name == 'md5':
+            # a bare /login answered without a challenge logged nobody in;
+            # the trap of the plain login, if any, tells why
+            if name == order[-1]:
+                raise refused or RosAPIError(
+                    'No challenge in the reply to /login.')
+            continue
+        if token is not None:
+            hasher = hashlib.md5()
+            hasher.update(b'\x00')
+            hasher.update(pwd)
+            hasher.update(binascii.unhexlify(token))
+            yield [b'/login', b'=name=' + username,
+                   b'=response=00' + hasher.hexdigest().encode('ascii')]
+            name = 'md5'
+        yield name
+        return
+
+
+def parse_sentence(sentence):
+    """Split a reply sentence into its type, attributes and .tag."""
+    attrs = {}
+    tag = None
+    for line in sentence[1:]:
+        if line.startswith(b'.tag='):
+            tag = line[5:]
+            continue
+        try:
+            second_eq_pos = line.index(b'=', 1)
+        except ValueError:
+            attrs[line[1:]] = b''
         else:
-            raise RosAPIFatalError('Unknown value: %x' % i)
+            attrs[line[1:second_eq_pos]] = line[second_eq_pos + 1:]
+    return sentence[0], attrs, tag
+
+
+class RosAPIAttributes(Mapping):
+    """Read-only mapping of the attribute words of one reply sentence.
+
+    It holds the bytes of the whole sentence and an array of where each
+    word starts and ends in them, and only splits a word into key and
+    value when it is looked up. Looking up one or two keys scans for them;
+    iterating splits every word once into an index. Keys and values are
+    bytes, as in the dicts parse_sentence() returns; text keys are encoded
+    to match.
+
+    Rows of the same command share names, so each key is kept once per
+    table rather than once per row.
+    """
+
+    __slots__ = ('data', 'spans', 'names', '_index')
+
+    def __init__(self, data, spans, names=None):
+        self.data = data
+        self.spans = spans
+        self.names = {} if names is None else names
+        self._index = None
+
+    def __getitem__(self, key):
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        if self._index is not None:
+            start, end = self._index[key]
+            return self.data[start:end]
+        data = self.data
+        prefix = key + b'='
+        for start, end in self.words():
+            # the first character of the word, = or ., is not in the key
+            if data.startswith(prefix, start + 1, end):
+                return data[start + 1 + len(prefix):end]
+            if end - start == len(key) + 1 and \
+                    data.startswith(key, start + 1, end):
+                return b''
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.index())
+
+    def __len__(self):
+        return len(self.index())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def index(self):
+        """Split every word, return {key: (value start, value end)}."""
+        if self._index is None:
+            data = self.data
+            names = self.names
+            index = {}
+            for start, end in self.words():
+                equals = data.find(b'=', start + 1, end)
+                if equals < 0:
+                    key = data[start + 1:end]
+                    equals = end - 1
+                else:
+                    key = data[start + 1:equals]
+                index[names.setdefault(key, key)] = (equals + 1, end)
+            self._index = index
+        return self._index
+
+    def words(self):
+        """(start, end) of every attribute word."""
+        spans = self.spans
+        return zip(spans[::2], spans[1::2])
+
 
-    def _unpack(self, times, i):
-        temp1 = self.to_bytes(i)
-        temp2 = self.api.read_bytes(times)
+class RosAPICommand(object):
+    """A command sent with RosAPI.send() and the replies routed to it.
+
+    Iterating over the command yields (reply, attrs) as soon as each reply
+    is parsed and drops it afterwards, so even huge prints are processed in
+    bounded memory. result() collects them all into a list like talk().
+
+    A command not done by its deadline (time.time() based) is cancelled
+    and RosAPITimeoutError raised. path is its command word, under which
+    the api's metrics record how long it took.
+    """
+
+    # seconds the router gets to confirm a /cancel
+    cancel_timeout = 5.0
+
+    def __init__(self, api, tag, deadline=None, path=None):
+        self.api = api
+        self.tag = tag
+        self.deadline = deadline
+        self.path = path
+        self.started = time.time()
+        self.replies = collections.deque()
+        # attribute names seen in the replies, shared by their rows
+        self.names = {}
+        self.done = False
+        self.discard = False
+        self.cancelled = False
+
+    def __iter__(self):
+        trap = None
         try:
-            temp3 = temp2.decode('utf-8')
-        except:
+            while True:
+                while not self.replies:
+                    self.read_reply()
+                reply, attrs = self.replies.popleft()
+                if reply == b'!trap' and trap is None:
+                    trap = attrs
+                if reply == b'!done':
+                    if trap is not None:
+                        raise RosAPIError(trap)
+                    yield reply, attrs
+                    return
+                yield reply, attrs
+        except GeneratorExit:
+            # the consumer stopped early
             try:
-                temp3 = temp2.decode('windows-1252')
-            except Exception:
-                print("Cannot decode response properly:", temp2)
-                print(Exception)
-                exit(1)
-
-        res = temp1 + temp3
-        return self.from_bytes(res)
-
-    if PY2:
-        def from_bytes(self, data):
-            data_values = [ord(char) for char in data]
-            value = 0
-            for byte_value in data_values:
-                value <<= 8
-                value += byte_value
-            return value
-
-        def to_bytes(self, i, size=1):
-            data = []
-            for _ in xrange(size):
-                data.append(chr(i & 0xff))
-                i >>= 8
-            return b''.join(reversed(data))
-    else:
-        def from_bytes(self, data):
-            return int.from_bytes(data, 'big')
-
-        def to_bytes(self, i, size=1):
-            return i.to_bytes(size, 'big')
+                self.stop()
+            except RosAPIConnectionError:
+                pass
+            raise
+        finally:
+            # the rest of the replies are read off the wire and thrown away
+            if not self.done:
+                self.discard = True
+
+    def wait(self):
+        while not self.done:
+            self.read_reply()
+
+    def result(self):
+        """Wait for !done and return the (reply, attrs) list like talk()."""
+        return list(self)
+
+    def read_reply(self):
+        try:
+            self.api.read_reply(self.deadline)
+        except RosAPITimeoutError:
+            if not self.cancelled:
+                self.cancel()
+            raise
+
+    def stop(self):
+        """Send /cancel for a tagged command without waiting on it.
+
+        The router stops sending replies the next commands would have to
+        read past, and those already on the way are dropped as they come.
+        """
+        self.discard = True
+        self.replies.clear()
+        if self.done or self.cancelled or self.tag is None:
+            return
+        self.cancelled = True
+        cancel = self.api.send([b'/cancel', b'=tag=' + self.tag])
+        cancel.discard = True
+        cancel.cancelled = True
+
+    def cancel(self):
+        """Stop the command with /cancel and drop its remaining replies.
+
+        The connection is closed when the command is untagged or the
+        router does not confirm within cancel_timeout.
+        """
+        if self.done or self.cancelled:
+            return
+        self.cancelled = True
+        self.discard = True
+        self.replies.clear()
+        if self.tag is None:
+            self.api.close()
+            return
+        self.deadline = time.time() + self.cancel_timeout
+        cancel = self.api.send([b'/cancel', b'=tag=' + self.tag],
+                               deadline=self.deadline)
+        cancel.discard = True
+        cancel.cancelled = True
+        try:
+            self.wait()
+            cancel.wait()
+        except RosAPIError:
+            self.api.close()
+            raise
+
+
+RosAPIEvent = collections.namedtuple('RosAPIEvent', 'type id attrs')
+
+
+class RosAPISubscription(object):
+    """Events of a command that keeps replying, like /listen or a print
+    with =follow=, until it is cancelled.
+
+    Iterating yields a RosAPIEvent for every !re: 'add' for an .id not
+    seen before, 'change' for one seen, 'delete' for .dead rows. The
+    command is tagged, so other commands can use the connection meanwhile.
+    """
+
+    def __init__(self, api, words):
+        self.api = api
+        self.command = api.send(words)
+        self.ids = set()
+        self.cancelled = False
+
+    def __iter__(self):
+        command = self.command
+        while True:
+            while not command.replies:
+                if command.done:
+                    return
+                command.read_reply()
+            reply, attrs = command.replies.popleft()
+            if reply == b'!re':
+                yield self.event(attrs)
+            elif reply == b'!trap' and not self.cancelled:
+                command.discard = True
+                raise RosAPIError(attrs)
+
+    def event(self, attrs):
+        row_id = attrs.get(b'.id')
+        if attrs.get(b'.dead') in (b'true', b'yes'):
+            self.ids.discard(row_id)
+            return RosAPIEvent('delete', row_id, attrs)
+        if row_id in self.ids:
+            return RosAPIEvent('change', row_id, attrs)
+        if row_id is not None:
+            self.ids.add(row_id)
+        return RosAPIEvent('add', row_id, attrs)
+
+    def cancel(self):
+        """Stop the command and drop its replies still on the wire."""
+        self.cancelled = True
+        self.command.cancel()
+
+
+class RosAPIReader(object):
+    """Buffered socket reader.
+
+    Replies are received with recv_into() in large chunks into one
+    preallocated buffer and words and length prefixes are sliced out of it,
+    so a reply costs a handful of syscalls instead of two per word.
+    """
+
+    buffer_size = 65536
+
+    def __init__(self, socket, buffer_size=None, metrics=None):
+        self.socket = socket
+        self.metrics = metrics
+        self.buffer_size = buffer_size or self.buffer_size
+        self.buffer = bytearray(self.buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+
+    def read(self, length):
+        if self.end - self.start < length:
+            if length > len(self.buffer):
+                return self._read_large(length)
+            self._compact()
+            while self.end < length:
+                self.end += self._recv_into(self.view[self.end:])
+        data = self.view[self.start:self.start + length].tobytes()
+        self.start += length
+        return data
+
+    def read_length(self):
+        """Decode the next word length straight from the buffer.
+
+        One and two byte lengths, nearly every word, take a shortcut. A
+        length split across two receives is left to RosApiLengthUtils.
+        """
+        buffer = self.buffer
+        start = self.start
+        available = self.end - start
+        if available:
+            first = buffer[start]
+            if first < 0x80:
+                self.start = start + 1
+                return first
+            if first < 0xC0 and available > 1:
+                self.start = start + 2
+                return (first & 0x3F) << 8 | buffer[start + 1]
+            prefix = RosApiLengthUtils.prefixes[first]
+            if prefix is not None and available > prefix[0]:
+                following, length = prefix
+                for position in range(start + 1, start + 1 + following):
+                    length = length << 8 | buffer[position]
+                self.start = start + 1 + following
+                return length
+        return RosApiLengthUtils.decode_length(self.read)
+
+    def read_sentence(self):
+        """Read a whole sentence, copying it out of the buffer only once.
+
+        Returns the bytes of the sentence and a flat list of the start and
+        end of each of its words in them. The buffer grows for a sentence
+        bigger than it.
+        """
+        prefixes = RosApiLengthUtils.prefixes
+        spans = []
+        position = self.start
+        while True:
+            if position >= self.end:
+                position = self._fill(position, 1)
+            first = self.buffer[position]
+            if first < 0x80:
+                length = first
+                position += 1
+            else:
+                prefix = prefixes[first]
+                if prefix is None:
+                    raise RosAPIFatalError('Unknown value: %x' % first)
+                following, length = prefix
+                if position + following >= self.end:
+                    position = self._fill(position, following + 1)
+                buffer = self.buffer
+                for offset in range(1, following + 1):
+                    length = length << 8 | buffer[position + offset]
+                position += following + 1
+            if not length:
+                break
+            if position + length > self.end:
+                position = self._fill(position, length)
+            spans.append(position - self.start)
+            spans.append(position - self.start + length)
+            position += length
+        data = self.view[self.start:position].tobytes()
+        self.start = position
+        if self.start == self.end and len(self.buffer) > self.buffer_size:
+            self.buffer = bytearray(self.buffer_size)
+            self.view = memoryview(self.buffer)
+            self.start = self.end = 0
+        return data, spans
+
+    def _fill(self, position, length):
+        """Receive until length bytes from position are in the buffer.
+
+        Returns position, which moves when the buffer is compacted.
+        """
+        position -= self.start
+        self._compact()
+        if position + length > len(self.buffer):
+            buffer = bytearray(max(position + length, 2 * len(self.buffer)))
+            buffer[:self.end] = self.view[:self.end]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        while self.end < position + length:
+            self.end += self._recv_into(self.view[self.end:])
+        return position
+
+    def _read_large(self, length):
+        # words bigger than the buffer are received straight into their
+        # own bytearray instead of going through the shared buffer
+        data = bytearray(length)
+        view = memoryview(data)
+        received = self.end - self.start
+        view[:received] = self.view[self.start:self.end]
+        self.start = self.end = 0
+        while received < length:
+            received += self._recv_into(view[received:])
+        return bytes(data)
+
+    def _compact(self):
+        pending = self.end - self.start
+        if self.start:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+        self.start = 0
+        self.end = pending
+
+    def _recv_into(self, view):
+        try:
+            received = self.socket.recv_into(view)
+        except socket.timeout:
+            raise RosAPITimeoutError('Timed out waiting for a reply.')
+        except socket.error as e:
+            raise RosAPIConnectionError(str(e))
+        if received == 0:
+            raise RosAPIConnectionError('Connection closed by remote end.')
+        if self.metrics is not None:
+            self.metrics.bytes_received += received
+        return received
 
 
 class RosAPI(object):
     """Routeros api"""
 
-    def __init__(self, socket):
+    def __init__(self, socket, reader=None, trace=None, metrics=None):
         self.socket = socket
+        self.reader = reader or RosAPIReader(socket, metrics=metrics)
+        self.trace = trace
+        self.metrics = metrics
         self.length_utils = RosApiLengthUtils(self)
+        self.write_buffer = bytearray()
+        self.pending = {}
+        self.next_tag = 0
+
+    def login(self, username, pwd, method=None):
+        """Log in and return the login method that worked, see login_steps."""
+        if self.metrics is not None:
+            self.metrics.logins += 1
+        steps = login_steps(username, pwd, method)
+        step = next(steps)
+        while step not in LOGIN_METHODS:
+            try:
+                replies = self.talk(step)
+            except (RosAPIConnectionError, RosAPIFatalError,
+                    RosAPITimeoutError):
+                raise
+            except RosAPIError as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(replies)
+        return step
+
+    def talk(self, words, timeout=None):
+        """Send words and return the (reply, attrs) list.
+
+        With a timeout in seconds the command is tagged, so it can be
+        cancelled when it runs out of time; RosAPITimeoutError is raised
+        and the session stays usable.
+        """
+        if timeout is not None:
+            return self.send(words, deadline=time.time() + timeout).result()
+        if not words:
+            return
+        command = RosAPICommand(self, None, path=words[0])
+        self.write_sentence(words)
+        self.pending[None] = command
+        return command.result()
+
+    def talk_many(self, sentences):
+        """Send all sentences tagged in one write and wait for every reply.
+
+        Returns the talk() result of each sentence, in order.
+        """
+        commands = [self.send(words, flush=False) for words in sentences]
+        self.flush()
+        for command in commands:
+            command.wait()
+        return [command.result() for command in commands]
+
+    def pipeline(self, sentences, window=64):
+        """Send sentences tagged, back to back, with up to window of them
+        waiting for their replies at any time.
+
+        Returns one entry per sentence, in order: its talk() result, or the
+        RosAPIError of its !trap. When the connection is lost, each
+        sentence still without a !done gets the RosAPIConnectionError or
+        RosAPIFatalError instead, as it may or may not have been run. The
+        error is only raised when not a byte of the batch went out.
+        """
+        results = []
+        in_flight = collections.deque()
+        try:
+            for words in sentences:
+                if len(in_flight) >= window:
+                    self.flush()
+                    results.append(self.outcome(in_flight.popleft()))
+                in_flight.append(self.send(words, flush=False))
+            self.flush()
+            while in_flight:
+                results.append(self.outcome(in_flight.popleft()))
+        except (RosAPIConnectionError, RosAPIFatalError) as e:
+            if not results and getattr(e, 'unsent', False):
+                raise
+            results.extend([e] * (len(sentences) - len(results)))
+        return results
 
-    def login(self, username, pwd):
-        for _, attrs in self.talk([b'/login']):
-            token = binascii.unhexlify(attrs[b'ret'])
-        hasher = hashlib.md5()
-        hasher.update(b'\x00')
-        hasher.update(pwd)
-        hasher.update(token)
-        self.talk([b'/login', b'=name=' + username,
-                   b'=response=00' + hasher.hexdigest().encode('ascii')])
-
-    def talk(self, words):
-        if self.write_sentence(words) == 0:
+    @staticmethod
+    def outcome(command):
+        try:
+            return command.result()
+        except (RosAPIConnectionError, RosAPIFatalError, RosAPITimeoutError):
+            raise
+        except RosAPIError as e:
+            return e
+
+    def iter_talk(self, words, timeout=None):
+        """Like talk() but yield each (reply, attrs) as soon as it is parsed.
+
+        The command is tagged, so a consumer may stop early and keep using
+        the connection: closing the iterator cancels the command.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        return iter(self.send(words, deadline=deadline))
+
+    def subscribe(self, words):
+        """Send words and return a RosAPISubscription of its events."""
+        return RosAPISubscription(self, words)
+
+    def send(self, words, flush=True, deadline=None):
+        """Send words tagged with .tag and return its RosAPICommand.
+
+        Several commands can be in flight on the connection at once, their
+        replies are routed to the right RosAPICommand by tag. Pass
+        flush=False to queue a batch of commands and send it with flush().
+        """
+        words = list(words)
+        self.next_tag += 1
+        tag = str(self.next_tag).encode('ascii')
+        command = self.pending[tag] = RosAPICommand(
+            self, tag, deadline, path=words[0] if words else None)
+        self.write_sentence(words + [b'.tag=' + tag], flush)
+        return command
+
+    def read_reply(self, deadline=None):
+        """Read one reply sentence and hand it to the command it belongs to.
+
+        With a deadline the socket waits no longer than until then. A
+        sentence cut short by the timeout is read again from its start
+        next time.
+        """
+        if deadline is None:
+            data, spans = self.reader.read_sentence()
+        else:
+            data, spans = self.read_sentence_until(deadline)
+        if self.trace is not None:
+            self.trace.record('<<<', [data[spans[index]:spans[index + 1]]
+                                      for index in range(0, len(spans), 2)])
+        if not spans:
             return
-        output = []
-        while True:
-            input_sentence = self.read_sentence()
-            if not len(input_sentence):
-                continue
-            attrs = {}
-            reply = input_sentence.pop(0)
-            for line in input_sentence:
-                try:
-                    second_eq_pos = line.index(b'=', 1)
-                except IndexError:
-                    attrs[line[1:]] = b''
-                else:
-                    attrs[line[1:second_eq_pos]] = line[second_eq_pos + 1:]
-            output.append((reply, attrs))
-            if reply == b'!done':
-                if output[0][0] == b'!trap':
-                    raise RosAPIError(output[0][1])
-                if output[0][0] == b'!fatal':
-                    self.socket.close()
-                    raise RosAPIFatalError(output[0][1])
-                return output
-
-    def write_sentence(self, words):
-        words_written = 0
+        if self.metrics is not None:
+            self.metrics.sentences_received += 1
+        reply = data[spans[0]:spans[1]]
+        tag = None
+        for index in range(len(spans) - 2, 0, -2):
+            start = spans[index]
+            if data.startswith(b'.tag=', start, spans[index + 1]):
+                tag = data[start + 5:spans[index + 1]]
+                del spans[index:index + 2]
+                break
+        spans = array.array(str('I'), spans[2:])
+        if reply == b'!fatal':
+            self.socket.close()
+            raise RosAPIFatalError(RosAPIAttributes(data, spans))
+        try:
+            command = self.pending[tag]
+        except KeyError:
+            raise RosAPIError('Reply for unknown tag: %r' % tag)
+        if not command.discard:
+            command.replies.append(
+                (reply, RosAPIAttributes(data, spans, command.names)))
+        if reply == b'!done':
+            command.done = True
+            del self.pending[tag]
+            if self.metrics is not None:
+                self.metrics.command(command.path,
+                                     time.time() - command.started)
+
+    def read_sentence_until(self, deadline):
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise RosAPITimeoutError('Timed out waiting for a reply.')
+        previous = self.socket.gettimeout()
+        self.socket.settimeout(remaining)
+        try:
+            return self.reader.read_sentence()
+        finally:
+            self.socket.settimeout(previous)
+
+    def close(self):
+        self.socket.close()
+
+    def peer_closed(self):
+        """Whether the router closed this idle connection, without blocking.
+
+        With no command waiting for replies the router has nothing to
+        send, so a readable socket means it closed the connection.
+        """
+        if self.pending or self.reader.end > self.reader.start:
+            return False
+        try:
+            return bool(select.select([self.socket], [], [], 0)[0])
+        except (socket.error, select.error, ValueError):
+            return True
+
+    def write_sentence(self, words, flush=True):
+        """Encode words as one sentence and send it.
+
+        With flush=False the sentence is only queued, so several sentences
+        can go out in a single write on the next flush().
+        """
+        self.write_buffer += self.encode_sentence(words)
+        if self.trace is not None:
+            self.trace.record('>>>', words)
+        if self.metrics is not None:
+            self.metrics.sentences_sent += 1
+        if flush:
+            self.flush()
+        return len(words)
+
+    def encode_sentence(self, words):
+        length_to_bytes = self.length_utils.length_to_bytes
+        sentence = bytearray()
         for word in words:
-            self.write_word(word)
-            words_written += 1
-        self.write_word(b'')
-        return words_written
+            if not isinstance(word, bytes):
+                word = word.encode('utf-8')
+            sentence += length_to_bytes(len(word))
+            sentence += word
+        sentence += b'\x00'
+        return sentence
+
+    def flush(self):
+        if self.write_buffer:
+            data = bytes(self.write_buffer)
+            self.write_buffer = bytearray()
+            self.write_bytes(data)
 
     def read_sentence(self):
         sentence = []
@@ -177,40 +840,29 @@ class RosAPI(object):
             sentence.append(word)
 
     def write_word(self, word):
-        logger.debug('>>> %s' % word)
         self.length_utils.write_lenght(len(word))
         self.write_bytes(word)
 
     def read_word(self):
-        word = self.read_bytes(self.length_utils.read_length())
-        logger.debug('<<< %s' % word)
-        return word
+        return self.read_bytes(self.read_length())
+
+    def read_length(self):
+        return self.reader.read_length()
 
     def write_bytes(self, data):
-        sent_overal = 0
-        while sent_overal < len(data):
-            try:
-                sent = self.socket.send(data[sent_overal:])
-            except socket.error as e:
-                raise RosAPIConnectionError(str(e))
-            if sent == 0:
-                raise RosAPIConnectionError('Connection closed by remote end.')
-            sent_overal += sent
+        sent = 0
+        try:
+            while sent < len(data):
+                sent += self.socket.send(data[sent:])
+        except socket.error as e:
+            error = RosAPIConnectionError(str(e))
+            error.unsent = sent == 0
+            raise error
+        if self.metrics is not None:
+            self.metrics.bytes_sent += len(data)
 
     def read_bytes(self, length):
-        received_overal = b''
-        while len(received_overal) < length:
-            try:
-                received = self.socket.recv(
-                    length - len(received_overal))
-            except socket.error as e:
-                raise RosAPIConnectionError(str(e))
-            if len(received) == 0:
-                raise RosAPIConnectionError('Connection closed by remote end.')
-            received_overal += received
-        return received_overal
-
-
+        return self.reader.read(length)
 
 
 class BaseRouterboardResource(object):
@@ -218,20 +870,27 @@ class BaseRouterboardResource(object):
         self.api = api
         self.namespace = namespace
 
-    def call(self, command, set_kwargs, query_kwargs=None):
-        query_kwargs = query_kwargs or {}
-        query_arguments = self._prepare_arguments(True, **query_kwargs)
-        set_arguments = self._prepare_arguments(False, **set_kwargs)
-        query = ([('%s/%s' % (self.namespace, command)).encode('ascii')] +
-                 query_arguments + set_arguments)
-        response = self.api.api_client.talk(query)
+    def call(self, command, set_kwargs, query_kwargs=None, queries=()):
+        return list(self.iter_call(command, set_kwargs, query_kwargs,
+                                   queries))
+
+    def iter_call(self, command, set_kwargs, query_kwargs=None, queries=()):
+        query = self._build_query(command, set_kwargs, query_kwargs, queries)
+        response = self.api.api_client.iter_talk(query)
 
-        output = []
         for response_type, attributes in response:
             if response_type == b'!re':
-                output.append(self._remove_first_char_from_keys(attributes))
+                yield self._remove_first_char_from_keys(attributes)
 
-        return output
+    def _build_query(self, command, set_kwargs, query_kwargs=None,
+                     queries=()):
+        query_kwargs = query_kwargs or {}
+        query_arguments = self._prepare_arguments(True, **query_kwargs)
+        for query in queries:
+            query_arguments.extend(query.words)
+        set_arguments = self._prepare_arguments(False, **set_kwargs)
+        return ([('%s/%s' % (self.namespace, command)).encode('ascii')] +
+                query_arguments + set_arguments)
 
     @staticmethod
     def _prepare_arguments(is_query, **kwargs):
@@ -256,11 +915,20 @@ class BaseRouterboardResource(object):
             elements.append((key, value))
         return dict(elements)
 
-    def get(self, **kwargs):
-        return self.call('print', {}, kwargs)
+    def get(self, *queries, **kwargs):
+        """The rows, packed into read-only Rows sharing one schema.
 
-    def detailed_get(self, **kwargs):
-        return self.call('print', {'detail': b''}, kwargs)
+        Keyword arguments select rows with those values; queries built
+        with mt_api.query are filtered on the router as well.
+        """
+        return Rows(self.iter_get(*queries, **kwargs))
+
+    def iter_get(self, *queries, **kwargs):
+        return self.iter_call('print', {}, kwargs, queries)
+
+    def detailed_get(self, *queries, **kwargs):
+        return Rows(self.iter_call('print', {'detail': b''}, kwargs,
+                                   queries))
 
     def set(self, **kwargs):
         return self.call('set', kwargs)
@@ -273,31 +941,53 @@ class BaseRouterboardResource(object):
 
 
 class RouterboardResource(BaseRouterboardResource):
-    def detailed_get(self, **kwargs):
-        return self.call('print', {'detail': ''}, kwargs)
+    def detailed_get(self, *queries, **kwargs):
+        return Rows(self.iter_call('print', {'detail': ''}, kwargs, queries))
 
-    def call(self, command, set_kwargs, query_kwargs=None):
+    def iter_call(self, command, set_kwargs, query_kwargs=None, queries=()):
         query_kwargs = query_kwargs or {}
-        result = super(RouterboardResource, self).call(
+        result = super(RouterboardResource, self).iter_call(
             command, self._encode_kwargs(set_kwargs),
-            self._encode_kwargs(query_kwargs))
+            self._encode_kwargs(query_kwargs), queries)
         for item in result:
-            for k in item:
-                item[k] = item[k].decode('ascii')
-        return result
+            yield self._decode_values(item)
 
     def _encode_kwargs(self, kwargs):
         return dict((k, v.encode('ascii')) for k, v in kwargs.items())
 
+    @staticmethod
+    def _decode_values(item):
+        for k in item:
+            item[k] = item[k].decode('ascii')
+        return item
+
 
 class RouterboardAPI(object):
-    def __init__(self, host, username='api', password='', port=8728, ssl=False):
+    """Connection to one router.
+
+    With ssl=True the api-ssl service is used, port 8729 unless given.
+    ssl_options are passed to ssl_utils.get_context(): verify, cafile,
+    check_hostname and ciphers. connect_timeout bounds opening the
+    connection, timeout every read after that. A metrics.Metrics passed
+    as metrics counts the traffic of every connection opened.
+    """
+
+    def __init__(self, host, username='api', password='', port=None,
+                 ssl=False, ssl_options=None, trace=None, timeout=15.0,
+                 connect_timeout=10.0, metrics=None):
         self.host = host
+        self.metrics = metrics
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
         self.username = username
         self.password = password
         self.socket = None
-        self.port = port
+        self.port = port or (API_SSL_PORT if ssl else 8728)
         self.ssl = ssl
+        self.ssl_options = ssl_options or {}
+        self.trace = trace if trace is not None else WireTrace.from_env()
+        self.host_cache = HostCache()
+        self.breaker = CircuitBreaker()
         self.reconnect()
 
     def __enter__(self):
@@ -309,33 +999,55 @@ class RouterboardAPI(object):
     def reconnect(self):
         if self.socket:
             self.close_connection()
+        # the circuit counts a reconnect as one attempt, whatever number
+        # of retries it took, so a short outage does not open it
+        check_circuit(self.breaker, self.host, self.port)
+        connected = False
         try:
-            for retry in retryloop(10, delay=0.1, timeout=30):
+            for retry in retryloop(10, delay=0.1, timeout=30, jitter=True,
+                                   max_delay=5):
                 try:
                     self.connect()
+                except socket.error:
+                    retry()
+                    continue
+                if not connected:
+                    connected = True
+                    self.breaker.success(self.host, self.port)
+                try:
                     self.login()
                 except socket.error:
                     retry()
         except (socket.error, RetryError) as e:
+            if not connected:
+                self.breaker.failure(self.host, self.port)
             raise RosAPIConnectionError(str(e))
 
     def connect(self):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(15.0)
-        sock.connect((self.host, self.port))
+        sock = connect(self.host, self.port, self.connect_timeout)
+        sock.settimeout(self.timeout)
         set_keepalive(sock, after_idle_sec=10)
+        set_nodelay(sock)
         if self.ssl:
             try:
-                self.socket = ssl.wrap_socket(sock)
+                self.socket = wrap_socket(sock, self.host, self.port,
+                                          **self.ssl_options)
             except ssl.SSLError as e:
+                sock.close()
                 raise RosAPIConnectionError(str(e))
         else:
             self.socket = sock
-        self.api_client = RosAPI(self.socket)
+        if self.metrics is not None:
+            self.metrics.connections += 1
+        self.api_client = RosAPI(self.socket, trace=self.trace,
+                                 metrics=self.metrics)
 
     def login(self):
-        self.api_client.login(self.username.encode('ascii'),
-                              self.password.encode('ascii'))
+        method = self.host_cache.get(self.host, self.port, 'login')
+        used = self.api_client.login(self.username.encode('ascii'),
+                                     self.password.encode('ascii'), method)
+        if used != method:
+            self.host_cache.set(self.host, self.port, 'login', used)
 
     def get_resource(self, namespace):
         return RouterboardResource(self, namespace)
@@ -344,36 +1056,401 @@ class RouterboardAPI(object):
         return BaseRouterboardResource(self, namespace)
 
     def close_connection(self):
+        if self.ssl:
+            remember_session(self.socket, self.host, self.port)
         self.socket.close()
 
 
-class Mikrotik(object):
+class PersistentSession(object):
+    """RosAPI stand-in for modules run with connection: routeros_api.
+
+    Commands are forwarded over json-rpc to the routeros_api connection
+    plugin, which keeps one authenticated API session per host open in
+    ansible-connection across tasks. Replies come back whole, so
+    iter_talk() does not stream here. The metrics count sentences and
+    command times as seen from the module; the connection and its bytes
+    belong to the plugin.
+    """
+
+    # seconds to wait on ansible-connection, a safety net so a task whose
+    # connection stopped answering fails instead of hanging
+    timeout = 300.0
+
+    def __init__(self, socket_path, metrics=None, timeout=None):
+        self.socket_path = socket_path
+        self.metrics = metrics
+        self.timeout = timeout or self.timeout
+        self.socket = None
+
+    def open(self):
+        return self._rpc('open')
+
+    def talk(self, words, timeout=None):
+        started = time.time()
+        replies = self._to_replies(
+            self._rpc('talk', self._to_words(words), timeout))
+        self._count([words], [replies], started)
+        return replies
+
+    def talk_many(self, sentences):
+        started = time.time()
+        results = self._rpc(
+            'talk_many', [self._to_words(words) for words in sentences])
+        results = [self._to_replies(replies) for replies in results]
+        self._count(sentences, results, started)
+        return results
+
+    def pipeline(self, sentences, window=64):
+        started = time.time()
+        results = self._rpc(
+            'pipeline', [self._to_words(words) for words in sentences],
+            window)
+        self._count(sentences, results, started)
+        return [self._to_result(result) for result in results]
+
+    def iter_talk(self, words, timeout=None):
+        return iter(self.talk(words, timeout))
+
+    def subscribe(self, words):
+        raise RosAPIError(
+            'Subscriptions need a direct connection, not socket_path.')
+
+    def _count(self, sentences, results, started):
+        # a batch is sent and answered at once, so every command in it
+        # took the time of the whole batch
+        if self.metrics is None:
+            return
+        elapsed = time.time() - started
+        for words, replies in zip(sentences, results):
+            self.metrics.sentences_sent += 1
+            # a trap comes back as one dict
+            self.metrics.sentences_received += (
+                len(replies) if isinstance(replies, list) else 1)
+            if words:
+                self.metrics.command(words[0], elapsed)
+
+    def close(self):
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def _rpc(self, method, *args):
+        request = request_builder(method, *args)
+        try:
+            if self.socket is None:
+                self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.socket.settimeout(self.timeout)
+                self.socket.connect(self.socket_path)
+            send_data(self.socket, to_bytes('EXEC: ' + json.dumps(request)))
+            recv_data(self.socket)
+            out = recv_data(self.socket)
+            recv_data(self.socket)
+        except socket.error as e:
+            self.close()
+            raise RosAPIConnectionError(
+                'Persistent connection failed: %s' % e)
+        if out is None:
+            self.close()
+            raise RosAPIConnectionError(
+                'Persistent connection closed by ansible-connection.')
+        response = json.loads(to_text(out, errors='surrogate_then_replace'))
+        if 'error' in response:
+            # ansible-connection serves one client at a time, so the next
+            # attempt must not find this one still connected
+            self.close()
+            error = response['error']
+            data = error.get('data')
+            if isinstance(data, dict):
+                # the plugin could not reach the router, see
+                # reports_connection_errors() in routeros_api
+                if data.get('connection'):
+                    raise RosAPIConnectionError(data['message'])
+                data = data.get('message')
+            raise RosAPIError(data or error['message'])
+        return response['result']
+
+    @staticmethod
+    def _to_words(words):
+        return [to_text(word, errors='surrogate_or_strict') for word in words]
+
+    @staticmethod
+    def _to_replies(replies):
+        return [(to_native(reply), dict((to_native(k), to_native(v))
+                                        for k, v in attrs.items()))
+                for reply, attrs in replies]
+
+    @classmethod
+    def _to_result(cls, result):
+        """A pipeline() entry from its json-rpc form."""
+        if not isinstance(result, dict):
+            return cls._to_replies(result)
+        if 'dropped' in result:
+            return RosAPIConnectionError(to_native(result['dropped']))
+        return RosAPIError(dict((to_native(k), to_native(v))
+                                for k, v in result['trap'].items()))
+
 
-  def __init__(self, hostname, username, password):
+class Mikrotik(object):
+  '''
+  Mikrotik Class
+    - Holds a single authenticated RosAPI session for its whole lifetime.
+      The session is opened on the first login() or talk() and reused by
+      every following command. If the router drops an idle session it is
+      reopened transparently.
+    - connections counts the TCP connections actually opened.
+    - ssl=True talks to the api-ssl service (port 8729 by default), see
+      ssl_utils for ssl_options.
+    - The login method each router accepts is remembered in HostCache, so
+      later runs log in with one round trip on RouterOS 6.43 and later.
+    - With socket_path (module._socket_path) set, commands go through the
+      routeros_api persistent connection plugin instead.
+    - trace, or MT_API_TRACE, keeps a WireTrace of the session whose last
+      sentences are attached to any RosAPIError raised.
+    - The connection is opened to any address of hostname, IPv4 or IPv6,
+      within connect_timeout seconds; timeout, if set, bounds every read.
+    - After 3 failed connects in a row to a router, connecting to it fails
+      straight away for a minute, see circuit_breaker.
+    - metrics counts connections, logins, sentences and bytes, and times
+      every command by its path, see metrics.
+
+  Example Usage:
+    with Mikrotik(hostname, username, password) as mk:
+      mk.api_print('/interface')
+      mk.api_print('/ip/address')
+  '''
+
+  def __init__(self, hostname, username, password, port=None,
+               socket_path=None, ssl=False, ssl_options=None, trace=None,
+               timeout=None, connect_timeout=10.0):
     self.hostname = hostname
+    self.timeout = timeout
+    self.connect_timeout = connect_timeout
     self.username = username
     self.password = password
+    self.port = port or (API_SSL_PORT if ssl else 8728)
+    self.ssl = ssl
+    self.ssl_options = ssl_options or {}
+    self.socket_path = socket_path
+    self.trace = trace if trace is not None else WireTrace.from_env()
+    self.api = None
+    self.metrics = Metrics()
+    self.host_cache = HostCache()
+    self.breaker = CircuitBreaker()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, _, __, ___):
+    self.close()
+
+  @property
+  def connections(self):
+    return self.metrics.connections
 
   def login(self):
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.connect((self.hostname, 8728))
-    mt = RosAPI(s)
-    mt.login(self.username, self.password)
-    return mt
-
-  def talk(self, talk_command):
-    r = self.login()
-    response = r.talk(talk_command)
+    if self.api is None and self.socket_path:
+      # the routeros_api connection plugin holds the session
+      mt = PersistentSession(self.socket_path, metrics=self.metrics)
+      try:
+        mt.open()
+      except Exception:
+        mt.close()
+        raise
+      self.api = mt
+    elif self.api is None:
+      check_circuit(self.breaker, self.hostname, self.port)
+      try:
+        s = connect(self.hostname, self.port, self.connect_timeout)
+      except socket.error as e:
+        self.breaker.failure(self.hostname, self.port)
+        raise RosAPIConnectionError(
+            'Could not connect to %s:%s: %s' % (self.hostname, self.port, e))
+      self.breaker.success(self.hostname, self.port)
+      s.settimeout(self.timeout)
+      set_nodelay(s)
+      self.metrics.connections += 1
+      if self.ssl:
+        try:
+          s = wrap_socket(s, self.hostname, self.port, **self.ssl_options)
+        except ssl.SSLError as e:
+          s.close()
+          raise RosAPIConnectionError(str(e))
+      mt = RosAPI(s, trace=self.trace, metrics=self.metrics)
+      # the login method learnt on an earlier run spares probing for it
+      method = self.host_cache.get(self.hostname, self.port, 'login')
+      try:
+        used = mt.login(to_bytes(self.username), to_bytes(self.password),
+                        method)
+      except RosAPIError as e:
+        mt.close()
+        self.add_trace(e)
+        raise
+      except Exception:
+        mt.close()
+        raise
+      if used != method:
+        self.host_cache.set(self.hostname, self.port, 'login', used)
+      self.api = mt
+    return self.api
+
+  def close(self):
+    if self.api is not None:
+      if self.ssl and isinstance(self.api, RosAPI):
+        remember_session(self.api.socket, self.hostname, self.port)
+      self.api.close()
+      self.api = None
+
+  def add_trace(self, error):
+    '''
+    Attach the last traced sentences to error, if tracing is on.
+    '''
+    if self.trace is not None and getattr(error, 'trace', None) is None:
+      error.trace = self.trace.lines()
+
+  def call(self, function, replay=False):
+    '''
+    Run function(session) on the open session. A session the router
+    closed while idle is reopened first. If it turns out dropped while
+    function runs, function is run again on a new session only when
+    that cannot apply a change twice: nothing was sent, or replay is set
+    because the command only reads.
+    '''
+    if isinstance(self.api, RosAPI) and self.api.peer_closed():
+      self.close()
+    reused = self.api is not None
+    try:
+      try:
+        return function(self.login())
+      except RosAPIFatalError:
+        self.close()
+        raise
+      except RosAPIConnectionError as e:
+        self.close()
+        # only a session that sat idle between commands gets a second
+        # chance, a fresh connection failing means the router is really
+        # unreachable; a write that may have reached it is never resent
+        if not reused or not (replay or e.unsent):
+          raise
+      return function(self.login())
+    except RosAPIError as e:
+      self.add_trace(e)
+      raise
+
+  def talk(self, talk_command, timeout=None):
+    '''
+    A command still running after timeout seconds is cancelled and
+    RosAPITimeoutError raised; the session stays open.
+    '''
+    response = self.call(lambda r: r.talk(talk_command, timeout),
+                         replay=self.read_only(talk_command))
     return(response)
 
-  def api_print(self, base_path, params=None):
+  @staticmethod
+  def read_only(talk_command):
+    '''
+    Whether the command only reads (print, getall), so running it twice
+    changes nothing.
+    '''
+    if not talk_command:
+      return False
+    action = to_text(talk_command[0]).rpartition('/')[2]
+    return action in ('print', 'getall')
+
+  def talk_many(self, talk_commands):
+    '''
+    Send all commands tagged in one write and wait for every reply, so
+    a dozen prints cost one round trip instead of twelve. Returns the
+    responses in the order of talk_commands.
+    '''
+    return self.call(lambda r: r.talk_many(talk_commands),
+                     replay=all(self.read_only(c) for c in talk_commands))
+
+  def talk_pipelined(self, talk_commands, window=64):
+    '''
+    Send the commands back to back, with up to window of them waiting
+    for replies, so a bulk change costs bandwidth rather than a round
+    trip per command. Returns per command its response, or the
+    RosAPIError of its !trap.
+
+    A dropped session is never retried as a whole: the commands left
+    without a reply get its RosAPIConnectionError instead, and the
+    caller reads the table back to see which of them were applied.
+    '''
+    results = self.call(lambda r: r.pipeline(talk_commands, window))
+    for result in results:
+      if isinstance(result, (RosAPIConnectionError, RosAPIFatalError)):
+        self.close()
+        self.add_trace(result)
+        break
+    return results
+
+  def iter_talk(self, talk_command, timeout=None):
+    '''
+    Generator version of talk(), yields (reply, attrs) as they are parsed.
+    A dropped session is retried like talk() does, and only until the
+    first reply: after that the command has been seen by the router.
+    '''
+    def start(r):
+      replies = r.iter_talk(talk_command, timeout)
+      return replies, next(replies)
+
+    replies, first = self.call(start, replay=self.read_only(talk_command))
+    yield first
+    try:
+      for reply in replies:
+        yield reply
+    except RosAPIError as e:
+      self.add_trace(e)
+      raise
+
+  def api_print(self, base_path, params=None, proplist=None, query=None):
+    '''
+    Returns the (reply, attrs) list like talk(), packed into Replies:
+    the rows share one schema and each keeps only where its values are.
+    proplist is a list of the only columns to return, sent as .proplist.
+    query is a dict of the values the rows must have, sent as ?key=value
+    words so the router filters the table, or a mt_api.query Query.
+    '''
+    return Replies(self.iter_print(base_path, params, proplist, query))
+
+  def iter_print(self, base_path, params=None, proplist=None, query=None):
+    return self.iter_talk(
+        self.print_command(base_path, params, proplist, query))
+
+  def print_command(self, base_path, params=None, proplist=None,
+                    query=None):
     command = [base_path + '/print']
     if params is not None:
       for key, value in params.iteritems():
         item = b'=' + key + '=' + str(value)
         command.append(item)
-
-    return self.talk(command)
+    if proplist:
+      command.append(b'=.proplist=' + b','.join(proplist))
+    if isinstance(query, Query):
+      command.extend(query.words)
+    elif query is not None:
+      for key, value in query.iteritems():
+        command.append(b'?' + key + '=' + str(value))
+
+    return command
+
+  def api_follow(self, base_path, proplist=None, query=None,
+                 follow_only=False):
+    '''
+    Returns a RosAPISubscription of the add/change/delete events of the
+    rows of base_path. Unless follow_only, the existing rows come first
+    as adds. Stop it with cancel().
+    '''
+    command = self.print_command(base_path, proplist=proplist, query=query)
+    command.insert(1, b'=follow-only=' if follow_only else b'=follow=')
+    return self.call(lambda r: r.subscribe(command))
+
+  def api_listen(self, base_path):
+    '''
+    Returns a RosAPISubscription of the changes to base_path, with
+    /listen. Stop it with cancel().
+    '''
+    return self.call(lambda r: r.subscribe([base_path + '/listen']))
 
   def api_add(self, base_path, params):
     command = [base_path + '/add']
@@ -391,6 +1468,35 @@ class Mikrotik(object):
 
     return self.talk(command)
 
+  def api_add_many(self, base_path, params_list, window=64):
+    '''
+    api_add() of every params dict, pipelined. Returns the (params,
+    RosAPIError) of each add the router refused or, with a
+    RosAPIConnectionError, did not answer before the session dropped.
+    '''
+    commands = []
+    for params in params_list:
+      command = [base_path + '/add']
+      for key, value in params.iteritems():
+        command.append(b'=' + key + '=' + str(value))
+      commands.append(command)
+    results = self.talk_pipelined(commands, window)
+    return [(params, result) for params, result in zip(params_list, results)
+            if isinstance(result, RosAPIError)]
+
+  def api_remove_many(self, base_path, remove_ids, window=64):
+    '''
+    api_remove() of every id, pipelined. Returns the (id, RosAPIError) of
+    each remove the router refused or, with a RosAPIConnectionError, did
+    not answer before the session dropped.
+    '''
+    commands = [[base_path + '/remove', b'=.id=' + remove_id]
+                for remove_id in remove_ids]
+    results = self.talk_pipelined(commands, window)
+    return [(remove_id, result)
+            for remove_id, result in zip(remove_ids, results)
+            if isinstance(result, RosAPIError)]
+
   def api_remove(self, base_path, remove_id):
     command = [
         base_path + '/remove',
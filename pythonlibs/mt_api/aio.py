@@ -0,0 +1,291 @@
+"""asyncio client for the RouterOS API.
+
+Python 3 only, and not imported by mt_api itself so the blocking client
+keeps working on Python 2. The length codec, sentence encoding, reply
+parsing and login conversation are the ones RosAPI uses; only the I/O is
+different. Every command is tagged, so any number of them can be in flight
+on one session, and one event loop can drive thousands of sessions.
+
+Example Usage:
+    async def interfaces(host):
+        async with AsyncRouterboardAPI(host, 'admin', 'secret') as api:
+            return await api.get_resource('/interface').get()
+
+    loop.run_until_complete(asyncio.gather(*map(interfaces, hosts)))
+"""
+import asyncio
+
+from ansible.module_utils.mt_api import LOGIN_METHODS
+from ansible.module_utils.mt_api import RosAPI
+from ansible.module_utils.mt_api import RosAPIConnectionError
+from ansible.module_utils.mt_api import RosAPIError
+from ansible.module_utils.mt_api import RosAPIFatalError
+from ansible.module_utils.mt_api import RosAPITimeoutError
+from ansible.module_utils.mt_api import RosApiLengthUtils
+from ansible.module_utils.mt_api import RouterboardResource
+from ansible.module_utils.mt_api import login_steps
+from ansible.module_utils.mt_api import parse_sentence
+from ansible.module_utils.mt_api.rows import Rows
+from ansible.module_utils.mt_api.ssl_utils import API_SSL_PORT
+from ansible.module_utils.mt_api.ssl_utils import get_context
+
+
+class IncompleteRead(Exception):
+    pass
+
+
+class ParseBuffer(object):
+    """Reader for RosAPI serving the bytes received from a stream so far.
+
+    It raises IncompleteRead when a sentence has only partly arrived; the
+    caller then rewinds to the start of the sentence and waits for more.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.position = 0
+
+    def feed(self, data):
+        del self.data[:self.position]
+        self.position = 0
+        self.data += data
+
+    def read(self, length):
+        end = self.position + length
+        if end > len(self.data):
+            raise IncompleteRead()
+        chunk = bytes(self.data[self.position:end])
+        self.position = end
+        return chunk
+
+    def read_length(self):
+        return RosApiLengthUtils.decode_length(self.read)
+
+
+class AsyncRosAPICommand(object):
+    """A tagged command on an AsyncRosAPI session.
+
+    async for yields (reply, attrs) as each reply arrives. Leaving the loop
+    early, or cancelling the task waiting on it, sends /cancel for the tag.
+    """
+
+    def __init__(self, api, tag):
+        self.api = api
+        self.tag = tag
+        self.queue = asyncio.Queue()
+        self.done = False
+        self.discard = False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        trap = None
+        try:
+            while True:
+                item = await self.queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                reply, attrs = item
+                if reply == b'!trap' and trap is None:
+                    trap = attrs
+                if reply == b'!done':
+                    if trap is not None:
+                        raise RosAPIError(trap)
+                    yield reply, attrs
+                    return
+                yield reply, attrs
+        finally:
+            if not self.done:
+                self.api.cancel(self)
+
+    async def result(self):
+        """Wait for !done and return the (reply, attrs) list like talk()."""
+        return [reply async for reply in self]
+
+
+class AsyncRosAPI(object):
+    """RouterOS API session over an asyncio stream pair."""
+
+    read_size = 65536
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.buffer = ParseBuffer()
+        self.codec = RosAPI(None, reader=self.buffer)
+        self.pending = {}
+        self.next_tag = 0
+        self.error = None
+        self.dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def login(self, username, pwd, method=None):
+        steps = login_steps(username, pwd, method)
+        step = next(steps)
+        while step not in LOGIN_METHODS:
+            try:
+                replies = await self.talk(step)
+            except (RosAPIConnectionError, RosAPIFatalError,
+                    RosAPITimeoutError):
+                raise
+            except RosAPIError as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(replies)
+        return step
+
+    async def talk(self, words, timeout=None):
+        """Send words and return the (reply, attrs) list. A command still
+        running after timeout seconds is cancelled and RosAPITimeoutError
+        raised."""
+        command = self.send(words)
+        await self.writer.drain()
+        try:
+            return await asyncio.wait_for(command.result(), timeout)
+        except asyncio.TimeoutError:
+            raise RosAPITimeoutError(
+                'No reply within %s seconds.' % timeout)
+
+    def iter_talk(self, words):
+        return self.send(words).__aiter__()
+
+    def send(self, words):
+        if self.error is not None:
+            raise self.error
+        self.next_tag += 1
+        tag = str(self.next_tag).encode('ascii')
+        command = self.pending[tag] = AsyncRosAPICommand(self, tag)
+        self.writer.write(
+            bytes(self.codec.encode_sentence(list(words) + [b'.tag=' + tag])))
+        return command
+
+    def cancel(self, command):
+        """Stop a running command, its remaining replies are dropped."""
+        command.discard = True
+        if self.error is None and command.tag in self.pending:
+            self.send([b'/cancel', b'=tag=' + command.tag]).discard = True
+
+    def close(self):
+        self.dispatcher.cancel()
+        self.writer.close()
+
+    async def _read_sentence(self):
+        while True:
+            start = self.buffer.position
+            try:
+                return self.codec.read_sentence()
+            except IncompleteRead:
+                self.buffer.position = start
+            data = await self.reader.read(self.read_size)
+            if not data:
+                raise RosAPIConnectionError('Connection closed by remote end.')
+            self.buffer.feed(data)
+
+    async def _dispatch(self):
+        try:
+            while True:
+                sentence = await self._read_sentence()
+                if not len(sentence):
+                    continue
+                reply, attrs, tag = parse_sentence(sentence)
+                if reply == b'!fatal':
+                    raise RosAPIFatalError(attrs)
+                command = self.pending.get(tag)
+                if command is None:
+                    continue
+                if not command.discard:
+                    command.queue.put_nowait((reply, attrs))
+                if reply == b'!done':
+                    command.done = True
+                    del self.pending[tag]
+        except asyncio.CancelledError:
+            error = RosAPIConnectionError('Connection closed.')
+        except RosAPIError as e:
+            error = e
+        except OSError as e:
+            error = RosAPIConnectionError(str(e))
+        except Exception as e:
+            error = e
+        self.error = error
+        for command in self.pending.values():
+            command.queue.put_nowait(error)
+        self.pending.clear()
+        self.writer.close()
+
+
+class AsyncRouterboardResource(RouterboardResource):
+    """RouterboardResource whose get/set/add/remove are coroutines."""
+
+    async def call(self, command, set_kwargs, query_kwargs=None,
+                   queries=()):
+        items = [item async for item in
+                 self.iter_call(command, set_kwargs, query_kwargs, queries)]
+        return items
+
+    async def get(self, *queries, **kwargs):
+        return Rows(await self.call('print', {}, kwargs, queries))
+
+    async def detailed_get(self, *queries, **kwargs):
+        return Rows(await self.call('print', {'detail': ''}, kwargs,
+                                    queries))
+
+    async def iter_call(self, command, set_kwargs, query_kwargs=None,
+                        queries=()):
+        query = self._build_query(
+            command, self._encode_kwargs(set_kwargs),
+            self._encode_kwargs(query_kwargs or {}), queries)
+        async for response_type, attributes in \
+                self.api.api_client.iter_talk(query):
+            if response_type == b'!re':
+                yield self._decode_values(
+                    self._remove_first_char_from_keys(attributes))
+
+
+class AsyncRouterboardAPI(object):
+    def __init__(self, host, username='api', password='', port=None,
+                 ssl=False, timeout=15.0, ssl_options=None):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.port = port or (API_SSL_PORT if ssl else 8728)
+        self.ssl = ssl
+        self.ssl_options = ssl_options or {}
+        self.timeout = timeout
+        self.api_client = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, _, __, ___):
+        self.close_connection()
+
+    async def connect(self):
+        ssl_context = None
+        if self.ssl:
+            ssl_context = get_context(**self.ssl_options)
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=ssl_context),
+                self.timeout)
+            self.api_client = AsyncRosAPI(reader, writer)
+            await asyncio.wait_for(
+                self.api_client.login(self.username.encode('ascii'),
+                                      self.password.encode('ascii')),
+                self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            self.close_connection()
+            raise RosAPIConnectionError(str(e) or 'Connection timed out.')
+        except BaseException:
+            # a refused login or a cancelled task must not leave the
+            # stream and its dispatcher running
+            self.close_connection()
+            raise
+
+    def get_resource(self, namespace):
+        return AsyncRouterboardResource(self, namespace)
+
+    def close_connection(self):
+        if self.api_client is not None:
+            self.api_client.close()
+            self.api_client = None
@@ -0,0 +1,54 @@
+"""Per router circuit breaker for connection attempts.
+
+After threshold failed connects in a row to a router the circuit opens:
+connecting fails straight away for reset_after seconds instead of waiting
+on a router that is down, then one attempt is let through again. A
+success closes the circuit.
+
+The state is shared by every connection of the process and kept in the
+HostCache for ttl seconds, so the next module runs against the same
+router fail fast too.
+"""
+import time
+
+from ansible.module_utils.mt_api.host_cache import HostCache
+
+
+class CircuitBreaker(object):
+    # (host, port) -> [failures, opened_at], shared within the process
+    states = {}
+
+    def __init__(self, threshold=3, reset_after=60, ttl=600):
+        # failures older than ttl are forgotten by the next runs
+        self.host_cache = HostCache(ttl=ttl)
+        self.threshold = threshold
+        self.reset_after = reset_after
+
+    def allow(self, host, port):
+        """Whether a connect to host should be tried."""
+        failures, opened_at = self._state(host, port)
+        return (failures < self.threshold or
+                opened_at + self.reset_after <= time.time())
+
+    def retry_in(self, host, port):
+        """Seconds until the open circuit of host lets a connect through."""
+        opened_at = self._state(host, port)[1]
+        return max(0, opened_at + self.reset_after - time.time())
+
+    def failure(self, host, port):
+        failures = self._state(host, port)[0] + 1
+        state = [failures, time.time() if failures >= self.threshold else 0]
+        self.states[(host, port)] = state
+        self.host_cache.set(host, port, 'circuit', state)
+
+    def success(self, host, port):
+        if self._state(host, port)[0]:
+            self.states[(host, port)] = [0, 0]
+            self.host_cache.set(host, port, 'circuit', [0, 0])
+
+    def _state(self, host, port):
+        state = self.states.get((host, port))
+        if state is None:
+            state = self.host_cache.get(host, port, 'circuit') or [0, 0]
+            self.states[(host, port)] = state
+        return state
@@ -0,0 +1,64 @@
+"""Small on-disk cache of what was learnt about each router.
+
+Every module run is a new process, so anything found out by probing a
+router (which login method it takes, ...) is kept here and reused by the
+following runs. Entries are stored in one json file, keyed by host and
+port, and expire after ttl seconds so an upgraded router gets probed again.
+
+The directory is ~/.ansible/mt_api unless MT_API_CACHE_DIR is set; setting
+it to an empty string disables the cache. The cache is best effort, any
+error reading or writing it is treated as a miss.
+"""
+import json
+import os
+import tempfile
+import time
+
+
+class HostCache(object):
+    filename = 'hosts.json'
+
+    def __init__(self, directory=None, ttl=86400):
+        if directory is None:
+            directory = os.environ.get(
+                'MT_API_CACHE_DIR', os.path.join('~', '.ansible', 'mt_api'))
+        self.directory = os.path.expanduser(directory) if directory else None
+        self.ttl = ttl
+
+    def get(self, host, port, key):
+        entry = self._load().get(self._host_key(host, port), {}).get(key)
+        if entry is None or entry[1] + self.ttl < time.time():
+            return None
+        return entry[0]
+
+    def set(self, host, port, key, value):
+        if self.directory is None:
+            return
+        entries = self._load()
+        entries.setdefault(self._host_key(host, port), {})[key] = [
+            value, time.time()]
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            # write to a temporary file and rename it over the cache, so
+            # parallel forks never read a half written file
+            fd, path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.rename(path, os.path.join(self.directory, self.filename))
+        except (IOError, OSError):
+            pass
+
+    def _load(self):
+        if self.directory is None:
+            return {}
+        try:
+            with open(os.path.join(self.directory, self.filename)) as f:
+                entries = json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    @staticmethod
+    def _host_key(host, port):
+        return '%s:%s' % (host, port)
@@ -0,0 +1,75 @@
+"""Counters of the traffic with a router and latency of its commands.
+
+RosAPI only checks whether it has a Metrics, like a WireTrace, so a
+connection without one counts nothing. Mikrotik keeps one for every
+connection it opens: TCP connections, logins, sentences and bytes each
+way, and per command path (the menu and command, /ip/address/print) a
+histogram of the time from sending the command to its !done.
+
+Modules built on MikrotikIdempotent return as_dict() in the perf key of
+their result when MT_API_PERF is set, to see straight from the playbook
+output whether a slow task waited on connecting, logging in, a large
+print or many small commands.
+"""
+from __future__ import unicode_literals
+
+import bisect
+import os
+
+# upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+COUNTERS = ('connections', 'logins', 'sentences_sent', 'sentences_received',
+            'bytes_sent', 'bytes_received')
+
+
+def enabled():
+    """Whether MT_API_PERF asks for perf in the module results."""
+    return os.environ.get('MT_API_PERF', '') not in ('', '0')
+
+
+class Histogram(object):
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, milliseconds):
+        self.buckets[bisect.bisect_left(BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def as_dict(self):
+        """Count, total and max, and the non-empty buckets by upper bound."""
+        bounds = ['%d' % bound for bound in BUCKETS_MS] + ['+Inf']
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'max_ms': round(self.max, 3),
+            'buckets_ms': dict((bound, count) for bound, count in
+                               zip(bounds, self.buckets) if count),
+        }
+
+
+class Metrics(object):
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.commands = {}
+
+    def command(self, path, seconds):
+        """Record that a command on path took seconds to its !done."""
+        if isinstance(path, bytes):
+            path = path.decode('utf-8', 'replace')
+        histogram = self.commands.get(path)
+        if histogram is None:
+            histogram = self.commands[path] = Histogram()
+        histogram.add(seconds * 1000)
+
+    def as_dict(self):
+        result = dict((name, getattr(self, name)) for name in COUNTERS)
+        result['commands'] = dict((path, histogram.as_dict()) for
+                                  path, histogram in self.commands.items())
+        return result
@@ -0,0 +1,121 @@
+"""Build RouterOS print queries.
+
+A print query is a program for a small stack machine on the router. Each
+?key=value, ?<key=value, ?>key=value, ?key and ?-key word pushes the
+result of one test for every row, ?#| and ?#& pop two results and push
+their OR or AND, and ?#! negates the top one. Whatever is left on the
+stack at the end is ANDed.
+
+Key and Query compile Python expressions into those words:
+
+    dynamic = Key('dynamic') == True
+    gateway = Key('gateway').is_in('10.0.0.1', '10.0.0.2')
+    resource.get(dynamic & gateway)
+
+Every Query leaves exactly one result on the stack, so they nest freely.
+Keys are named like keyword arguments of the resources: id is .id and
+underscores are dashes.
+"""
+from __future__ import unicode_literals
+
+
+def encode_value(value):
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    if isinstance(value, bytes):
+        return value
+    return ('%s' % value).encode('utf-8')
+
+
+class Query(object):
+    """Query words leaving one result on the stack."""
+
+    def __init__(self, words):
+        self.words = tuple(words)
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Query(self.words + (b'?#!',))
+
+    def __repr__(self):
+        return 'Query(%r)' % (self.words,)
+
+
+def _combine(operator, queries):
+    if not queries:
+        raise ValueError('at least one query is needed')
+    words = list(queries[0].words)
+    for query in queries[1:]:
+        words.extend(query.words)
+        words.append(operator)
+    return Query(words)
+
+
+def And(*queries):
+    """Rows matching all the queries."""
+    return _combine(b'?#&', queries)
+
+
+def Or(*queries):
+    """Rows matching any of the queries."""
+    return _combine(b'?#|', queries)
+
+
+def Not(query):
+    """Rows not matching the query."""
+    return ~query
+
+
+class Key(object):
+    """A column of the rows, compared to build a Query."""
+
+    def __init__(self, name):
+        if isinstance(name, bytes):
+            name = name.decode('utf-8')
+        if name in ('id', 'proplist'):
+            name = '.%s' % name
+        self.name = name.replace('_', '-').encode('utf-8')
+
+    def _test(self, operator, value):
+        return Query((b'?' + operator + self.name + b'=' +
+                      encode_value(value),))
+
+    def __eq__(self, value):
+        return self._test(b'', value)
+
+    def __ne__(self, value):
+        return ~self._test(b'', value)
+
+    def __lt__(self, value):
+        return self._test(b'<', value)
+
+    def __gt__(self, value):
+        return self._test(b'>', value)
+
+    def __le__(self, value):
+        return ~self._test(b'>', value)
+
+    def __ge__(self, value):
+        return ~self._test(b'<', value)
+
+    __hash__ = None
+
+    def has(self):
+        """Rows with the column set."""
+        return Query((b'?' + self.name,))
+
+    def has_not(self):
+        """Rows without the column."""
+        return Query((b'?-' + self.name,))
+
+    def is_in(self, *values):
+        """Rows whose column equals one of values."""
+        return Or(*[self == value for value in values])
+
+    def __repr__(self):
+        return 'Key(%r)' % (self.name,)
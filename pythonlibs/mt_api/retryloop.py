@@ -1,4 +1,5 @@
 # retry loop from http://code.activestate.com/recipes/578163-retry-loop/
+import random
 import time
 import sys
 
@@ -7,10 +8,20 @@ class RetryError(Exception):
     pass
 
 
-def retryloop(attempts, timeout=None, delay=0, backoff=1):
+def retryloop(attempts, timeout=None, delay=0, backoff=1, jitter=False,
+              max_delay=None):
+    """Yield a retry() callable per attempt until one does not call it.
+
+    timeout is the budget of the whole loop: no sleep goes past it. With
+    jitter the sleeps are decorrelated jitter backoff, a random time
+    between delay and three times the previous sleep, so workers retrying
+    the same router drift apart instead of hitting it in lockstep.
+    max_delay caps a single sleep.
+    """
     starttime = time.time()
     success = set()
-    for i in range(attempts): 
+    sleep = delay
+    for i in range(attempts):
         success.add(True)
         yield success.clear
         if success:
@@ -19,8 +30,15 @@ def retryloop(attempts, timeout=None, delay=0, backoff=1):
         if timeout is not None and duration > timeout:
             break
         if delay:
-            time.sleep(delay)
-            delay *= backoff
+            if jitter:
+                sleep = random.uniform(delay, sleep * 3)
+            if max_delay is not None:
+                sleep = min(sleep, max_delay)
+            if timeout is not None:
+                sleep = min(sleep, timeout - duration)
+            time.sleep(sleep)
+            if not jitter:
+                sleep *= backoff
 
     e = sys.exc_info()[1]
 
@@ -0,0 +1,212 @@
+"""Compact containers for the rows of a print.
+
+A dict per row carries its own hash table and references to every key,
+which for big tables is most of the memory a print takes. Here the rows
+of one reply share a Schema of their column names, and each row only
+keeps its values in schema order:
+
+- rows read off the wire (RosAPIAttributes) keep the bytes of their
+  sentence and an array of where each column's value is in them,
+- any other mapping is packed into a tuple of its values.
+
+Row gives dict-like read access to one of them, created when the row is
+looked up. Everything here is a read-only Mapping or Sequence, which
+AnsibleModule.exit_json turns into plain dicts and lists.
+"""
+import array
+
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:
+    from collections import Mapping, Sequence
+
+
+class _Missing(object):
+    """Value of a column a row does not have."""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+
+class Schema(object):
+    """Column names of a table, in the order they were first seen."""
+
+    __slots__ = ('names', 'positions')
+
+    def __init__(self):
+        self.names = []
+        self.positions = {}
+
+    def add(self, key):
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = len(self.names)
+            self.names.append(key)
+        return position
+
+    def pack(self, row):
+        """Pack a mapping, return (record, data) for Row."""
+        words = getattr(row, 'words', None)
+        if words is not None:
+            return self.pack_words(row.data, words()), row.data
+        values = [MISSING] * len(self.names)
+        for key, value in row.items():
+            position = self.add(key)
+            if position >= len(values):
+                values.extend([MISSING] * (position + 1 - len(values)))
+            values[position] = value
+        return tuple(values), None
+
+    def pack_words(self, data, words):
+        """Offsets of the values of the attribute words, in column order.
+
+        Column n has its value at data[offsets[2n]:offsets[2n + 1] - 1],
+        an end of 0 marks a missing column.
+        """
+        offsets = array.array(str('I'), [0]) * (2 * len(self.names))
+        for start, end in words:
+            equals = data.find(b'=', start + 1, end)
+            if equals < 0:
+                equals = end - 1
+            position = self.add(data[start + 1:equals])
+            if 2 * position >= len(offsets):
+                offsets.extend([0] * (2 * position + 2 - len(offsets)))
+            offsets[2 * position] = equals + 1
+            offsets[2 * position + 1] = end + 1
+        return offsets
+
+    def position(self, key):
+        """Column of key, trying it as bytes and as text. None if unknown.
+        """
+        position = self.positions.get(key)
+        if position is None:
+            try:
+                if isinstance(key, bytes):
+                    key = key.decode('utf-8')
+                else:
+                    key = key.encode('utf-8')
+            except (AttributeError, UnicodeError):
+                return None
+            position = self.positions.get(key)
+        return position
+
+
+class Row(Mapping):
+    """Read-only dict-like view of one packed row."""
+
+    __slots__ = ('schema', 'record', 'data')
+
+    def __init__(self, schema, record, data=None):
+        self.schema = schema
+        self.record = record
+        self.data = data
+
+    def __getitem__(self, key):
+        position = self.schema.position(key)
+        if position is not None:
+            value = self._value(position)
+            if value is not MISSING:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        names = self.schema.names
+        for position in range(len(names)):
+            if self._value(position) is not MISSING:
+                yield names[position]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def _value(self, position):
+        record = self.record
+        if self.data is None:
+            if position < len(record):
+                return record[position]
+        elif 2 * position < len(record):
+            end = record[2 * position + 1]
+            if end:
+                return self.data[record[2 * position]:end - 1]
+        return MISSING
+
+
+class Rows(Sequence):
+    """Sequence of Row packed from an iterable of row mappings."""
+
+    __slots__ = ('schema', 'records', 'data')
+
+    def __init__(self, rows=()):
+        self.schema = Schema()
+        self.records = []
+        self.data = []
+        for row in rows:
+            self.append(row)
+
+    def append(self, row):
+        record, data = self.schema.pack(row)
+        self.records.append(record)
+        self.data.append(data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Row(self.schema, self.records[index], self.data[index])
+
+    def __len__(self):
+        return len(self.records)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Replies(Rows):
+    """Sequence of (reply, attrs) like RosAPI.talk() returns, rows packed.
+
+    The !re rows are packed; !done and any other reply, which come after
+    them, are kept as they are.
+    """
+
+    __slots__ = ('row_reply', 'others')
+
+    def __init__(self, replies=()):
+        super(Replies, self).__init__()
+        self.row_reply = b'!re'
+        self.others = []
+        for reply, attrs in replies:
+            if reply == b'!re' or reply == '!re':
+                self.row_reply = reply
+                self.append(attrs)
+            else:
+                self.others.append((reply, attrs))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('reply index out of range')
+        if index < len(self.records):
+            return self.row_reply, Row(
+                self.schema, self.records[index], self.data[index])
+        return self.others[index - len(self.records)]
+
+    def __len__(self):
+        return len(self.records) + len(self.others)
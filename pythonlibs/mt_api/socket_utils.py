@@ -1,4 +1,9 @@
+import collections
+import errno
+import os
+import select
 import socket
+import time
 
 
 # http://stackoverflow.com/a/14855726
@@ -13,3 +18,75 @@ def set_keepalive(sock, after_idle_sec=1, interval_sec=3, max_fails=5):
     sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, after_idle_sec)
     sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval_sec)
     sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, max_fails)
+
+
+def set_nodelay(sock):
+    """Disable Nagle's algorithm on an open socket.
+
+    Sentences are written whole, so there is nothing to gain from holding
+    back small segments until the previous one is acknowledged.
+    """
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def connect(host, port, timeout=None, delay=0.25):
+    """Open a TCP connection to host, trying all its addresses.
+
+    The addresses from getaddrinfo are tried happy eyeballs style (RFC
+    8305): the families alternate, IPv6 first, and when an attempt has not
+    connected after delay seconds the next one starts alongside it. The
+    first to connect is returned, in blocking mode, and the others are
+    closed. timeout bounds the whole connect; when it runs out, or every
+    address fails, the last socket.error is raised.
+    """
+    addresses = _interleave(
+        socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+    deadline = None if timeout is None else time.time() + timeout
+    pending = {}
+    error = socket.error('No address found for %s' % host)
+    try:
+        while addresses or pending:
+            if addresses:
+                family, socktype, proto, _, address = addresses.pop(0)
+                sock = socket.socket(family, socktype, proto)
+                sock.setblocking(False)
+                code = sock.connect_ex(address)
+                if code in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    pending[sock.fileno()] = sock
+                else:
+                    sock.close()
+                    error = socket.error(code, os.strerror(code))
+                    continue
+            wait = delay if addresses else None
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise socket.timeout('timed out connecting to %s' % host)
+                wait = remaining if wait is None else min(wait, remaining)
+            _, writable, _ = select.select([], list(pending.values()), [],
+                                           wait)
+            for sock in writable:
+                del pending[sock.fileno()]
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code:
+                    sock.close()
+                    error = socket.error(code, os.strerror(code))
+                    continue
+                sock.setblocking(True)
+                return sock
+        raise error
+    finally:
+        for sock in pending.values():
+            sock.close()
+
+
+def _interleave(addresses):
+    families = collections.OrderedDict()
+    for address in sorted(addresses, key=lambda a: a[0] != socket.AF_INET6):
+        families.setdefault(address[0], []).append(address)
+    ordered = []
+    while any(families.values()):
+        for family in families.values():
+            if family:
+                ordered.append(family.pop(0))
+    return ordered
@@ -0,0 +1,73 @@
+"""TLS for the api-ssl service (port 8729).
+
+All connections of a process share one SSLContext per set of options,
+instead of building a new default context on every connect, and the TLS
+session of each host is kept so reconnecting to it resumes the session
+rather than doing a full handshake. Session resumption needs Python 3.6;
+older versions still share the context.
+
+Certificate verification is off by default, like ssl.wrap_socket() which
+was used before. A router with no certificate assigned to api-ssl only
+offers anonymous DH, which needs ciphers='ADH:@SECLEVEL=0'.
+"""
+import ssl
+
+API_SSL_PORT = 8729
+
+_contexts = {}
+_sessions = {}
+
+
+def get_context(verify=False, cafile=None, check_hostname=None, ciphers=None):
+    """Return the shared SSLContext for these options, creating it once.
+
+    check_hostname defaults to verify.
+    """
+    if check_hostname is None:
+        check_hostname = verify
+    key = (verify, cafile, check_hostname, ciphers)
+    context = _contexts.get(key)
+    if context is None:
+        context = ssl.SSLContext(
+            getattr(ssl, 'PROTOCOL_TLS', ssl.PROTOCOL_SSLv23))
+        if verify:
+            context.verify_mode = ssl.CERT_REQUIRED
+            context.check_hostname = check_hostname
+            if cafile:
+                context.load_verify_locations(cafile)
+            else:
+                context.load_default_certs()
+        if ciphers:
+            context.set_ciphers(ciphers)
+        context = _contexts.setdefault(key, context)
+    return context
+
+
+def wrap_socket(sock, host, port, **options):
+    """Do the TLS handshake on a connected socket, resuming the session
+    of the last connection to host and port if there is one.
+
+    options are passed on to get_context().
+    """
+    context = get_context(**options)
+    kwargs = {}
+    if context.check_hostname:
+        kwargs['server_hostname'] = host
+    # a session can only be resumed from the context that created it
+    session = _sessions.get((host, port, context))
+    if session is not None:
+        kwargs['session'] = session
+    ssl_sock = context.wrap_socket(sock, **kwargs)
+    remember_session(ssl_sock, host, port)
+    return ssl_sock
+
+
+def remember_session(ssl_sock, host, port):
+    """Keep the session of ssl_sock for the next connection to host.
+
+    TLS 1.3 servers send the session ticket after the handshake, so this
+    is called again before the socket is closed.
+    """
+    session = getattr(ssl_sock, 'session', None)
+    if session is not None:
+        _sessions[(host, port, ssl_sock.context)] = session
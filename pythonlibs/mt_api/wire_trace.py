@@ -0,0 +1,93 @@
+"""Trace of the sentences sent to and received from a router.
+
+RosAPI only checks whether it has a trace, so tracing costs nothing while
+it is off. When on, every sentence is kept with its time in a ring buffer
+of the last sentences, and optionally written to a file up to max_bytes.
+Passwords, secrets and keys are redacted. Mikrotik attaches the buffered
+lines to the RosAPIError it raises, so they show in the failed task.
+
+Tracing is turned on by passing a WireTrace, or for every connection by
+setting MT_API_TRACE: to a file name to also write the trace there, or to
+1 for the ring buffer only. It is also on while the mt_api logger has
+debug enabled, logging each sentence.
+"""
+from __future__ import unicode_literals
+
+import collections
+import io
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+REDACTED_KEYS = ('password', 'response', 'secret', 'passphrase')
+
+
+def redact(word):
+    """Hide the value of attribute and query words carrying a secret."""
+    if word[:1] in ('=', '?'):
+        key, eq, _ = word[1:].partition('=')
+        if eq and (key in REDACTED_KEYS or key.endswith('-key')):
+            return word[0] + key + '=<redacted>'
+    return word
+
+
+class WireTrace(object):
+    def __init__(self, size=200, path=None, max_bytes=10 * 1024 * 1024,
+                 max_word=256, log=False):
+        self.sentences = collections.deque(maxlen=size)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_word = max_word
+        self.log = log
+        self.written = 0
+
+    @classmethod
+    def from_env(cls):
+        """The trace asked for by MT_API_TRACE or debug logging, or None."""
+        setting = os.environ.get('MT_API_TRACE')
+        log = logger.isEnabledFor(logging.DEBUG)
+        if not setting and not log:
+            return None
+        path = setting if setting and setting != '1' else None
+        return cls(path=path, log=log)
+
+    def record(self, direction, words):
+        entry = (time.time(), direction, tuple(words))
+        self.sentences.append(entry)
+        if self.path is not None and self.written < self.max_bytes:
+            self._write(self.format(entry))
+        if self.log:
+            logger.debug('%s', self.format(entry))
+
+    def format(self, entry):
+        timestamp, direction, words = entry
+        text = ' '.join(redact(self._to_text(word)) for word in words)
+        return '%s.%03d %s %s' % (
+            time.strftime('%H:%M:%S', time.localtime(timestamp)),
+            timestamp % 1 * 1000, direction, text)
+
+    def lines(self):
+        """The buffered sentences, oldest first."""
+        return [self.format(entry) for entry in self.sentences]
+
+    def _to_text(self, word):
+        if isinstance(word, bytes):
+            word = word.decode('utf-8', 'replace')
+        if len(word) > self.max_word:
+            word = '%s...(%d bytes)' % (word[:self.max_word], len(word))
+        return word
+
+    def _write(self, line):
+        line += '\n'
+        if self.written + len(line) > self.max_bytes:
+            line = '... trace truncated at %d bytes\n' % self.max_bytes
+            self.written = self.max_bytes
+        else:
+            self.written += len(line)
+        try:
+            with io.open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        except (IOError, OSError):
+            self.path = None
@@ -2,7 +2,6 @@
 from ansible.module_utils import mt_api
 import re
 import sys
-import socket
 
 
 def list_to_string(list):
@@ -51,6 +50,7 @@ class MikrotikIdempotent():
       desired_params  = params['settings'],
       idempotent_param= 'name',
       api_path        = '/interface/ethernet',
+      socket_path     = module._socket_path,
     )
 
     mt_obj.sync_state()
@@ -58,7 +58,7 @@ class MikrotikIdempotent():
 
   def __init__(
    self, hostname, username, password, desired_params, api_path,
-   state, idempotent_param, check_mode=False):
+   state, idempotent_param, check_mode=False, socket_path=None):
 
     self.hostname         = hostname
     self.username         = username
@@ -69,6 +69,7 @@ class MikrotikIdempotent():
     self.current_params   = {}
     self.api_path         = api_path
     self.check_mode       = check_mode
+    self.socket_path      = socket_path
 
     self.login_success    = False
     self.changed          = False
@@ -83,24 +84,34 @@ class MikrotikIdempotent():
       self.hostname,
       self.username,
       self.password,
+      socket_path=self.socket_path,
     )
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    result = sock.connect_ex((self.hostname, 8728))
-    if result == 0:
-      try:
-        self.mk.login()
-        self.login_success = True
-      except Exception as e:
-        self.failed_msg = "Could not log into Mikrotik device." + " Check the username and password. Exception {} - {}".format(type(e), e),
-    else:
-        self.failed_msg = "Could not access RouterOS api." + " Verify API service is enabled and not blocked by firewall.",
+    # the connection opened by login() is kept as the session, a failure
+    # to open it is told apart from a rejected login by its error
+    try:
+      self.mk.login()
+      self.login_success = True
+    except mt_api.RosAPIConnectionError:
+      self.failed_msg = "Could not access RouterOS api." + " Verify API service is enabled and not blocked by firewall.",
+    except Exception as e:
+      self.failed_msg = "Could not log into Mikrotik device." + " Check the username and password. Exception {} - {}".format(type(e), e),
+
 
+  def perf_result(self):
+    '''
+    {'perf': ...} with the connections, logins, sentences, bytes and
+    command latencies of this run when MT_API_PERF is set, else {}.
+    Modules pass it to exit_json and fail_json.
+    '''
+    if not mt_api.metrics.enabled():
+      return {}
+    return {'perf': self.mk.metrics.as_dict()}
 
   def get_current_params(self):
     clean_params(self.desired_params)
     self.param_id = None
     self.current_param = None
-    self.current_params = self.mk.api_print(base_path=self.api_path)
+    self.current_params = self.print_current_params()
 
     # When state and idempotent_param is None we are working
     # on editable params only and we are grabbing the only item from response
@@ -126,6 +137,47 @@ class MikrotikIdempotent():
             #    ...
             # }
 
+  def print_current_params(self):
+    '''
+    Print the rows matching the desired idempotent_param value with a
+    query, so the router only sends those. Menus that reject the query
+    get the whole table, which get_current_params searches anyway.
+    '''
+    query = None
+    value = self.desired_params.get(self.idempotent_param)
+    if value is not None and not isinstance(value, list):
+      query = {self.idempotent_param: value}
+    if query is not None:
+      try:
+        return self.mk.api_print(
+            base_path=self.api_path,
+            proplist=self.proplist(),
+            query=query,
+        )
+      except (mt_api.RosAPIConnectionError, mt_api.RosAPIFatalError):
+        raise
+      except mt_api.RosAPIError:
+        pass
+    return self.mk.api_print(
+        base_path=self.api_path,
+        proplist=self.proplist(),
+    )
+
+  def proplist(self):
+    '''
+    The columns compared by the sync: .id, the idempotent_param and
+    the desired params. None to print every column.
+    '''
+    if not self.desired_params:
+      return None
+    columns = ['.id']
+    if self.idempotent_param is not None:
+      columns.append(self.idempotent_param)
+    for key in self.desired_params:
+      if key not in columns:
+        columns.append(key)
+    return columns
+
   def add(self):
     # When current_param is empty we need to call api_add method to add
     # all the parameters in the desired_params
@@ -0,0 +1,122 @@
+"""Benchmark encoding and decoding of word length prefixes.
+
+Run: python tests/benchmarks/bench_length.py
+
+The "before" codec is the previous RosApiLengthUtils, which built every
+prefix byte by byte and decoded with several calls per length. It misread
+the five byte 0xF0 form, so that case is only timed "after". Decoding runs
+over the buffered reader, as it does when reading replies.
+"""
+from __future__ import print_function
+
+import sys
+
+from common import ReplaySocket, mt_api, timed
+
+PY2 = sys.version_info[0] < 3
+COUNT = 200000
+
+
+class PreviousLengthUtils(mt_api.RosApiLengthUtils):
+    def length_to_bytes(self, length):
+        if length < 0x80:
+            return self.to_bytes(length)
+        elif length < 0x4000:
+            length |= 0x8000
+            return self.to_bytes(length, 2)
+        elif length < 0x200000:
+            length |= 0xC00000
+            return self.to_bytes(length, 3)
+        elif length < 0x10000000:
+            length |= 0xE0000000
+            return self.to_bytes(length, 4)
+        else:
+            return self.to_bytes(0xF0) + self.to_bytes(length, 4)
+
+    def read_length(self):
+        b = self.api.read_bytes(1)
+        i = self.from_bytes(b)
+        if (i & 0x80) == 0x00:
+            return i
+        elif (i & 0xC0) == 0x80:
+            return self._unpack(1, i & ~0xC0)
+        elif (i & 0xE0) == 0xC0:
+            return self._unpack(2, i & ~0xE0)
+        elif (i & 0xF0) == 0xE0:
+            return self._unpack(3, i & ~0xF0)
+        elif (i & 0xF8) == 0xF0:
+            return self.from_bytes(self.api.read_bytes(1))
+        else:
+            raise mt_api.RosAPIFatalError('Unknown value: %x' % i)
+
+    def _unpack(self, times, i):
+        return self.from_bytes(self.to_bytes(i) + self.api.read_bytes(times))
+
+    if PY2:
+        def from_bytes(self, data):
+            value = 0
+            for char in data:
+                value <<= 8
+                value += ord(char)
+            return value
+
+        def to_bytes(self, i, size=1):
+            data = []
+            for _ in range(size):
+                data.append(chr(i & 0xff))
+                i >>= 8
+            return b''.join(reversed(data))
+    else:
+        def from_bytes(self, data):
+            return int.from_bytes(data, 'big')
+
+        def to_bytes(self, i, size=1):
+            return i.to_bytes(size, 'big')
+
+
+class PreviousRosAPI(mt_api.RosAPI):
+    def __init__(self, socket):
+        super(PreviousRosAPI, self).__init__(socket)
+        self.length_utils = PreviousLengthUtils(self)
+
+    def read_length(self):
+        return self.length_utils.read_length()
+
+
+CASES = [
+    ('1 byte', 0x45, True),
+    ('2 bytes', 0x1234, True),
+    ('3 bytes', 0x12345, True),
+    ('4 bytes', 0x1234567, True),
+    ('5 bytes', 0x12345678, False),
+]
+
+
+def encode(api_class, length):
+    length_to_bytes = api_class(None).length_utils.length_to_bytes
+    for _ in range(COUNT):
+        length_to_bytes(length)
+
+
+def decode(api_class, data, length):
+    api = api_class(ReplaySocket(data))
+    for _ in range(COUNT):
+        assert api.read_length() == length
+
+
+def main():
+    print('%-8s %-8s %14s %14s' % ('case', 'codec', 'encode/s', 'decode/s'))
+    for name, length, previous_works in CASES:
+        data = mt_api.RosApiLengthUtils(None).length_to_bytes(length) * COUNT
+        codecs = [('after', mt_api.RosAPI)]
+        if previous_works:
+            codecs.insert(0, ('before', PreviousRosAPI))
+        for label, api_class in codecs:
+            encoded, _ = timed(lambda: encode(api_class, length))
+            decoded, _ = timed(lambda: decode(api_class, data, length))
+            print('%-8s %-8s %14.0f %14.0f' % (
+                name, label, COUNT / encoded, COUNT / decoded))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark the memory held by the result of a 100k row print.
+
+Run: python tests/benchmarks/bench_memory.py
+
+"list of dicts" is what api_print returned before: a (b'!re', dict) pair
+per row. "list of attrs" is the same list with RosAPIAttributes rows, as
+talk() returns. "Replies" is api_print's packed result. Sizes come from
+tracemalloc where available (Python 3), else from walking the objects
+with gc.get_referents() and summing sys.getsizeof().
+"""
+from __future__ import print_function
+
+import gc
+import sys
+
+from common import ReplaySocket, encode_print_reply, mt_api
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+ROWS = 100000
+COLUMNS = 16
+
+
+def replies(data):
+    api = mt_api.RosAPI(ReplaySocket(data))
+    command = api.pending[None] = mt_api.RosAPICommand(api, None)
+    return iter(command)
+
+
+def list_of_dicts(data):
+    return [(reply, dict(attrs.items())) for reply, attrs in replies(data)]
+
+
+def list_of_attrs(data):
+    return list(replies(data))
+
+
+def packed(data):
+    return mt_api.Replies(replies(data))
+
+
+def deep_size(root):
+    seen = set()
+    pending = [root]
+    size = 0
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+    return size
+
+
+def measure(build, data):
+    if tracemalloc is None:
+        result = build(data)
+        return deep_size(result), result
+    gc.collect()
+    tracemalloc.start()
+    result = build(data)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def main():
+    data = encode_print_reply(ROWS, columns=COLUMNS)
+    print('%d rows of %d columns, measured with %s' % (
+        ROWS, COLUMNS, 'deep sizeof' if tracemalloc is None else
+        'tracemalloc'))
+    print('%-14s %10s %12s' % ('result', 'MB', 'bytes/row'))
+    for name, build in (('list of dicts', list_of_dicts),
+                        ('list of attrs', list_of_attrs),
+                        ('Replies', packed)):
+        size, result = measure(build, data)
+        assert len(result) == ROWS + 1
+        print('%-14s %10.1f %12.0f' % (name, size / 1e6, size / ROWS))
+        del result
+
+
+if __name__ == '__main__':
+    main()
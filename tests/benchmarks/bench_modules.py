@@ -0,0 +1,313 @@
+"""Benchmark whole module runs against the fake RouterOS API service.
+
+Run: python tests/benchmarks/bench_modules.py [--size 10 --size 1000]
+     [--latency 0 --latency 20] [--scenario addresslist] [--json FILE]
+
+Each scenario calls the main() of one library/mt_*.py module in this
+process, the way Ansible would run it, against a fake_routeros.FakeRouter
+seeded with a table of --size rows and answering every command --latency
+milliseconds late (one round trip; connecting is not delayed). For every
+invocation it reports the wall time, TCP connections, logins, sentences
+and bytes sent and received by the module, and its changed/failed
+result.
+
+Every module has a scenario except library/mikrotik.py, a stub on the
+external rosapi library that takes no router to connect to. Modules
+serving several menus are run on one of them; those on a settings menu
+(ppp_server, ntp_client, snmp) have a single row whatever the size.
+
+The modules always connect to port 8728, so the fake service listens on
+--host:8728; any 127.x.y.z address works on Linux. One untimed run of
+each scenario first fills the login method cache, as earlier runs would
+have; pass --cold to start every run with an empty cache instead.
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import imp
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from common import ROOT, mt_api
+from fake_routeros import FakeRouter, Table, default_tables
+
+from ansible.module_utils import basic
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+LIBRARY = os.path.join(ROOT, 'library')
+PORT = 8728
+
+
+def address(index):
+    return '10.%d.%d.%d' % (index >> 16 & 255, index >> 8 & 255,
+                            index & 255)
+
+
+def addresslist(router, size):
+    """Sync a list of size addresses of which a tenth changed."""
+    router.seed('/ip/firewall/address-list', size, lambda index: [
+        ('list', 'bench'), ('address', address(index)),
+        ('comment', 'entry %d' % index), ('disabled', 'false'),
+        ('dynamic', 'false')])
+    changed = max(1, size // 10)
+    return 'mt_ip_firewall_addresslist', {
+        'list_name': 'bench',
+        'state': 'present',
+        'address_list': [
+            {'address': address(index), 'comment': 'entry %d' % index}
+            for index in range(changed, size + changed)],
+    }
+
+
+def firewall_filter(router, size):
+    """Edit the comment of the rule in the middle of the chain."""
+    router.seed('/ip/firewall/filter', size, lambda index: [
+        ('chain', 'forward'), ('action', 'accept'),
+        ('comment', '%d rule' % index), ('disabled', 'false')])
+    return 'mt_ip_firewall', {
+        'parameter': 'filter',
+        'state': 'present',
+        'rule': {'chain': 'forward', 'action': 'accept',
+                 'place-before': size // 2, 'comment': 'edited'},
+    }
+
+
+def ip_address(router, size):
+    """Change one address out of size (a MikrotikIdempotent module)."""
+    router.seed('/ip/address', size, lambda index: [
+        ('address', address(index) + '/24'),
+        ('interface', 'ether%d' % (index + 1)), ('comment', 'old'),
+        ('disabled', 'false')])
+    return 'mt_ip_address', {
+        'state': 'present',
+        'settings': {'address': address(size // 2) + '/24',
+                     'interface': 'ether%d' % (size // 2 + 1),
+                     'comment': 'new'},
+    }
+
+
+def ppp_secret(router, size):
+    """Add one secret to a table of size (a MikrotikIdempotent module)."""
+    router.seed('/ppp/secret', size)
+    return 'mt_ppp_secret', {
+        'state': 'present',
+        'settings': {'name': 'new-user', 'password': 'secret'},
+    }
+
+
+def facts(router, size):
+    """Gather the facts of size ethernet interfaces."""
+    router.seed('/interface/ethernet', size)
+    return 'mt_facts', {'filter': 'interface_ethernet'}
+
+
+def command(router, size):
+    """Print a menu of size interfaces with a raw command."""
+    router.seed('/interface', size)
+    return 'mt_command', {'command': '/interface/print'}
+
+
+def login_test(router, size):
+    """Only log in, size does not matter."""
+    return 'mt_login_test', {}
+
+
+def radius_backup(router, size):
+    """Change the secret of one RADIUS client out of size."""
+    router.seed('/radius', size, lambda index: [
+        ('address', address(index)), ('comment', 'client %d' % index),
+        ('secret', 'old')])
+    return 'mt_radius_backup', {
+        'state': 'present',
+        'comment': 'client %d' % (size // 2),
+        'address': address(size // 2),
+        'secret': 'new',
+    }
+
+
+def item(module, path, key='name', **args):
+    """Scenario of a MikrotikIdempotent module on a menu of items: disable
+    the one in the middle of size, found by its key column."""
+    def scenario(router, size):
+        router.seed(path, size, lambda index: [
+            (key, 'item%d' % index), ('disabled', 'false')])
+        return module, dict(args, state='present', settings={
+            key: 'item%d' % (size // 2), 'disabled': 'true'})
+    return scenario
+
+
+def settings(module, path, **args):
+    """Scenario of a MikrotikIdempotent module on a settings menu, a
+    single row whatever the size: turn it on."""
+    def scenario(router, size):
+        router.tables[path.encode('ascii')] = Table(
+            settings={'enabled': 'false'})
+        return module, dict(args, settings={'enabled': 'true'})
+    return scenario
+
+
+SCENARIOS = [
+    ('addresslist', addresslist),
+    ('firewall_filter', firewall_filter),
+    ('ip_address', ip_address),
+    ('ppp_secret', ppp_secret),
+    ('facts', facts),
+    ('command', command),
+    ('login_test', login_test),
+    ('radius_backup', radius_backup),
+    ('dhcp_server', item('mt_dhcp_server', '/ip/dhcp-server',
+                         parameter='dhcp-server')),
+    ('hotspot', item('mt_hotspot', '/ip/hotspot', parameter='hotspot')),
+    ('wireless', item('mt_interface_wireless',
+                      '/interface/wireless/security-profiles',
+                      parameter='security-profiles')),
+    ('interfaces', item('mt_interfaces', '/interface/vlan',
+                        parameter='vlan')),
+    ('ip_pool', item('mt_ip', '/ip/pool', parameter='pool')),
+    ('neighbor', item('mt_neighbor', '/ip/neighbor/discovery',
+                      parameter='discovery')),
+    ('ppp_profile', item('mt_ppp_profile', '/ppp/profile')),
+    ('radius', item('mt_radius', '/radius', key='comment',
+                    parameter='radius')),
+    ('snmp_community', item('mt_snmp', '/snmp/community',
+                            parameter='community')),
+    ('scheduler', item('mt_system_scheduler', '/system/scheduler',
+                       parameter='scheduler')),
+    ('netwatch', item('mt_tool', '/tool/netwatch', key='host',
+                      parameter='netwatch')),
+    ('user', item('mt_user', '/user', parameter='user')),
+    ('ppp_server', settings('mt_ppp_server', '/interface/l2tp-server/server',
+                            server_type='l2tp')),
+    ('ntp_client', settings('mt_system', '/system/ntp/client',
+                            parameter='ntp_client')),
+    ('snmp', settings('mt_snmp', '/snmp', parameter='snmp')),
+]
+
+
+def load_module(name):
+    return imp.load_source('bench_' + name,
+                           os.path.join(LIBRARY, name + '.py'))
+
+
+def run_module(module, args):
+    """Call module.main() with args, return its parsed result."""
+    basic._ANSIBLE_ARGS = json.dumps(
+        {'ANSIBLE_MODULE_ARGS': args}).encode('utf-8')
+    stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        module.main()
+    except SystemExit:
+        pass
+    except Exception as e:
+        # a traceback fails the task under Ansible too
+        return {'failed': True, 'msg': '%s: %s' % (type(e).__name__, e)}
+    finally:
+        sys.stdout = stdout
+        basic._ANSIBLE_ARGS = None
+    lines = [line for line in output.getvalue().splitlines() if line]
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        return {'failed': True, 'msg': output.getvalue()}
+
+
+def invoke(router, scenario, size, latency):
+    """Run scenario once on a freshly seeded router and measure it."""
+    with router.lock:
+        router.tables = default_tables()
+        router.stats.clear()
+    router.latency = latency / 1000.0
+    name, args = scenario(router, size)
+    args.update(hostname=router.host, username='admin', password='')
+    module = load_module(name)
+    started = time.time()
+    result = run_module(module, args)
+    wall = time.time() - started
+    # drop the module's session so its connection is closed
+    gc.collect()
+    stats = router.stats
+    return {
+        'module': name,
+        'size': size,
+        'latency_ms': latency,
+        'wall_s': wall,
+        'connections': stats['connections'],
+        'logins': stats['logins'],
+        'sentences_sent': stats['sentences_in'],
+        'sentences_received': stats['sentences_out'],
+        'bytes_sent': stats['bytes_in'],
+        'bytes_received': stats['bytes_out'],
+        'changed': bool(result.get('changed')),
+        'failed': bool(result.get('failed')),
+        'msg': None if not result.get('failed') else result.get('msg'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--size', type=int, action='append',
+                        help='rows in the table, default 10, 100 and 1000')
+    parser.add_argument('--latency', type=float, action='append',
+                        help='milliseconds added to every reply, default '
+                        '0 and 20')
+    parser.add_argument('--scenario', action='append',
+                        choices=[name for name, _ in SCENARIOS])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--cold', action='store_true',
+                        help='empty login method cache for every run')
+    parser.add_argument('--json', metavar='FILE',
+                        help='also write the results to FILE as JSON')
+    args = parser.parse_args()
+    sizes = args.size or [10, 100, 1000]
+    latencies = args.latency or [0, 20]
+    scenarios = [(name, scenario) for name, scenario in SCENARIOS
+                 if not args.scenario or name in args.scenario]
+
+    cache_dir = tempfile.mkdtemp()
+    os.environ['MT_API_CACHE_DIR'] = cache_dir
+    router = FakeRouter(args.host, PORT).start()
+    results = []
+    print('%-16s %6s %7s %9s %5s %6s %9s %9s %11s %11s' % (
+        'scenario', 'size', 'rtt ms', 'wall s', 'conns', 'logins',
+        'sent', 'received', 'bytes sent', 'bytes recv'))
+    try:
+        for name, scenario in scenarios:
+            if not args.cold:
+                invoke(router, scenario, 1, 0)
+            for size in sizes:
+                for latency in latencies:
+                    if args.cold:
+                        shutil.rmtree(cache_dir, ignore_errors=True)
+                        mt_api.CircuitBreaker.states.clear()
+                    result = invoke(router, scenario, size, latency)
+                    result['scenario'] = name
+                    results.append(result)
+                    print('%-16s %6d %7g %9.3f %5d %6d %9d %9d %11d %11d%s'
+                          % (name, size, latency, result['wall_s'],
+                             result['connections'], result['logins'],
+                             result['sentences_sent'],
+                             result['sentences_received'],
+                             result['bytes_sent'], result['bytes_received'],
+                             '  FAILED: %s' % result['msg']
+                             if result['failed'] else ''))
+    finally:
+        router.close()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
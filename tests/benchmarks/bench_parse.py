@@ -0,0 +1,66 @@
+"""Benchmark parsing /print replies into rows.
+
+Run: python tests/benchmarks/bench_parse.py
+
+"before" reads every word into its own bytes and splits all of them into
+a dict with parse_sentence(), as RosAPI.read_reply did. "after" is
+read_reply() with RosAPIAttributes rows. Each is timed reading a 20k row
+reply when the caller uses no column, .id and one column, or every column.
+"""
+from __future__ import print_function
+
+from common import ReplaySocket, encode_print_reply, mt_api, timed
+
+ROWS = 20000
+COLUMNS = 16
+
+
+class PreviousRosAPI(mt_api.RosAPI):
+    def read_reply(self, deadline=None):
+        # the replayed reply is all there, so there is no deadline to keep
+        sentence = self.read_sentence()
+        reply, attrs, tag = mt_api.parse_sentence(sentence)
+        command = self.pending[tag]
+        command.replies.append((reply, attrs))
+        if reply == b'!done':
+            command.done = True
+            del self.pending[tag]
+
+
+def use_nothing(attrs):
+    pass
+
+
+def use_two(attrs):
+    return attrs[b'.id'], attrs[b'column-3']
+
+
+def use_all(attrs):
+    return list(attrs.items())
+
+
+def read_rows(api_class, data, use):
+    api = api_class(ReplaySocket(data))
+    command = api.pending[None] = mt_api.RosAPICommand(api, None)
+    rows = 0
+    for reply, attrs in command:
+        if reply == b'!re':
+            use(attrs)
+            rows += 1
+    return rows
+
+
+def main():
+    data = encode_print_reply(ROWS, columns=COLUMNS)
+    print('%-10s %-8s %12s' % ('columns', 'parser', 'rows/s'))
+    for name, use in (('none', use_nothing), ('.id + 1', use_two),
+                      ('all', use_all)):
+        for label, api_class in (('before', PreviousRosAPI),
+                                 ('after', mt_api.RosAPI)):
+            elapsed, rows = timed(lambda: read_rows(api_class, data, use))
+            assert rows == ROWS
+            print('%-10s %-8s %12.0f' % (name, label, rows / elapsed))
+
+
+if __name__ == '__main__':
+    main()
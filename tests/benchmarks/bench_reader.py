@@ -0,0 +1,64 @@
+"""Benchmark RosAPI reply reading before and after the buffered reader.
+
+Run: python tests/benchmarks/bench_reader.py
+
+The "before" reader is the previous RosAPI.read_bytes, which issued one
+recv() per length prefix and grew every word with bytes concatenation.
+"""
+from __future__ import print_function
+
+import socket
+
+from common import ReplaySocket, encode_print_reply, mt_api, timed
+
+
+class UnbufferedRosAPI(mt_api.RosAPI):
+    def read_bytes(self, length):
+        received_overal = b''
+        while len(received_overal) < length:
+            try:
+                received = self.socket.recv(
+                    length - len(received_overal))
+            except socket.error as e:
+                raise mt_api.RosAPIConnectionError(str(e))
+            if len(received) == 0:
+                raise mt_api.RosAPIConnectionError(
+                    'Connection closed by remote end.')
+            received_overal += received
+        return received_overal
+
+    def read_length(self):
+        return self.length_utils.read_length()
+
+
+def read_reply(api_class, data):
+    sock = ReplaySocket(data)
+    api = api_class(sock)
+    rows = 0
+    while True:
+        sentence = api.read_sentence()
+        if sentence[0] == b'!done':
+            break
+        rows += 1
+    return rows, sock.syscalls
+
+
+CASES = [
+    ('20k rows', encode_print_reply(20000)),
+    ('1 MB word', b'\xe0\x10\x00\x00' + b'x' * 0x100000 + b'\x00' +
+     encode_print_reply(0)),
+]
+
+
+def main():
+    print('%-10s %-10s %10s %12s' % ('case', 'reader', 'syscalls', 'MB/s'))
+    for name, data in CASES:
+        for label, api_class in (('before', UnbufferedRosAPI),
+                                 ('after', mt_api.RosAPI)):
+            elapsed, (_, syscalls) = timed(lambda: read_reply(api_class, data))
+            print('%-10s %-10s %10d %12.1f' % (
+                name, label, syscalls, len(data) / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Shared helpers for the mt_api benchmarks.
+
+mt_api is imported the same way the Ansible modules import it, through
+ansible.module_utils, so pythonlibs/ is appended to that package's search
+path (what module_utils = ./pythonlibs/ does in ansible.cfg).
+"""
+from __future__ import print_function
+
+import os
+import time
+
+import ansible.module_utils
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+PYTHONLIBS = os.path.join(ROOT, 'pythonlibs')
+if PYTHONLIBS not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.append(PYTHONLIBS)
+
+from ansible.module_utils import mt_api  # noqa: E402
+
+
+def encode_sentence(words):
+    length_utils = mt_api.RosApiLengthUtils(None)
+    data = [length_utils.length_to_bytes(len(word)) + word for word in words]
+    return b''.join(data) + b'\x00'
+
+
+def encode_print_reply(rows, columns=8, value_size=12, tag=None):
+    """Wire bytes of a /print reply with rows !re sentences and a !done."""
+    value = b'v' * value_size
+    length_utils = mt_api.RosApiLengthUtils(None)
+    columns_data = encode_sentence(
+        [('=column-%d=' % column).encode('ascii') + value
+         for column in range(columns)])[:-1]
+    end = encode_sentence([] if tag is None else [b'.tag=' + tag])
+    chunks = []
+    for row in range(rows):
+        row_id = ('=.id=*%X' % row).encode('ascii')
+        chunks.append(b'\x03!re' + length_utils.length_to_bytes(len(row_id)) +
+                      row_id + columns_data + end)
+    chunks.append(b'\x05!done' + end)
+    return b''.join(chunks)
+
+
+class ReplaySocket(object):
+    """Socket stand-in replaying canned reply bytes.
+
+    Like a kernel socket it hands out at most segment bytes per call and
+    counts every recv/recv_into/send call as a syscall.
+    """
+
+    def __init__(self, data=b'', segment=65536):
+        self.data = data
+        self.segment = segment
+        self.position = 0
+        self.syscalls = 0
+        self.sent = []
+
+    def _take(self, size):
+        size = min(size, self.segment, len(self.data) - self.position)
+        chunk = self.data[self.position:self.position + size]
+        self.position += size
+        return chunk
+
+    def recv(self, size):
+        self.syscalls += 1
+        return self._take(size)
+
+    def recv_into(self, view, size=0):
+        self.syscalls += 1
+        chunk = self._take(size or len(view))
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+    def send(self, data):
+        self.syscalls += 1
+        self.sent.append(bytes(data))
+        return len(data)
+
+    def sendall(self, data):
+        self.send(data)
+
+    def close(self):
+        pass
+
+
+def timed(function, repeat=3):
+    """Best wall time of repeat runs of function() and its last result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.time()
+        result = function()
+        elapsed = time.time() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
@@ -0,0 +1,648 @@
+"""In-process stand-in for the RouterOS API service.
+
+It speaks the API wire protocol on a TCP port, so mt_api and the mt_*
+modules can be exercised and timed without a router or the Vagrant CHR:
+
+- /login, plaintext (RouterOS 6.43+), plaintext only (RouterOS 7, a bare
+  /login gets no challenge) or the MD5 challenge of older versions,
+  checked against users
+- tagged commands, replies carry the .tag of their command
+- /print with =.proplist=, =count-only=, =follow= and =follow-only=,
+  /listen, and ?queries including the ?#|&! stack operators
+- /add, /set and /remove on in-memory menu tables, with !trap for
+  unknown items, duplicate entries and unknown commands
+- /cancel =tag= of a running follow or listen, or of a tagged print
+  still streaming its rows
+- an optional latency added before every reply, replies of pipelined
+  commands overlapping as they would on a real link
+
+It is independent of mt_api, so it checks the client rather than mirror
+it. Tables can be seeded with any number of rows:
+
+    with FakeRouter(latency=0.05) as router:
+        router.seed('/ip/firewall/address-list', 100000)
+        mk = mt_api.Mikrotik('127.0.0.1', 'admin', '', port=router.port)
+
+Run it on its own to point modules or playbooks at it:
+
+    python tests/benchmarks/fake_routeros.py --port 8728 \\
+        --seed /ip/firewall/address-list=100000
+"""
+from __future__ import print_function
+
+import argparse
+import binascii
+import collections
+import hashlib
+import os
+import socket
+import struct
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+def encode_length(length):
+    if length < 0x80:
+        return struct.pack('>B', length)
+    if length < 0x4000:
+        return struct.pack('>H', length | 0x8000)
+    if length < 0x200000:
+        return struct.pack('>I', length | 0xC00000)[1:]
+    if length < 0x10000000:
+        return struct.pack('>I', length | 0xE0000000)
+    return b'\xF0' + struct.pack('>I', length)
+
+
+def encode_sentence(words):
+    return b''.join(encode_length(len(word)) + word for word in words) + \
+        b'\x00'
+
+
+def to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return ('%s' % value).encode('utf-8')
+
+
+class Trap(Exception):
+    """Reply the running command with a !trap of this message."""
+
+    def __init__(self, message, category=None):
+        Exception.__init__(self, message)
+        self.message = message
+        self.category = category
+
+
+class Table(object):
+    """Rows of one menu, by .id in insertion order.
+
+    unique lists the columns whose values together must be unique, as
+    (list, address) for an address-list. A settings menu has one row
+    without .id, set changes it and add and remove are refused.
+    """
+
+    def __init__(self, unique=(), settings=None):
+        self.rows = collections.OrderedDict()
+        self.unique = tuple(to_bytes(key) for key in unique)
+        # unique values -> .id of the row holding them
+        self.index = {}
+        self.next_id = 1
+        self.settings = None
+        if settings is not None:
+            self.settings = collections.OrderedDict(
+                (to_bytes(k), to_bytes(v)) for k, v in settings.items())
+        self.listeners = []
+
+    def __len__(self):
+        return 1 if self.settings is not None else len(self.rows)
+
+    def items(self):
+        if self.settings is not None:
+            return [self.settings]
+        return list(self.rows.values())
+
+    def add(self, attrs, notify=True):
+        """Add a row of the (key, value) pairs attrs, return its .id."""
+        if self.settings is not None:
+            raise Trap('no such command')
+        row_id = ('*%X' % self.next_id).encode('ascii')
+        row = collections.OrderedDict([(b'.id', row_id)])
+        row.update(attrs)
+        key = self.unique_key(row)
+        if key is not None:
+            if key in self.index:
+                raise Trap('failure: already have such entry')
+            self.index[key] = row_id
+        self.next_id += 1
+        self.rows[row_id] = row
+        if notify:
+            self.notify(row)
+        return row_id
+
+    def set(self, attrs):
+        if self.settings is not None:
+            self.settings.update(attrs)
+            self.notify(self.settings)
+            return
+        changes = [(k, v) for k, v in attrs.items()
+                   if k not in (b'.id', b'numbers')]
+        for row in self.find(attrs):
+            changed = collections.OrderedDict(row)
+            changed.update(changes)
+            old_key, key = self.unique_key(row), self.unique_key(changed)
+            if key != old_key:
+                if key in self.index:
+                    raise Trap('failure: already have such entry')
+                self.index.pop(old_key, None)
+                if key is not None:
+                    self.index[key] = row[b'.id']
+            row.update(changes)
+            self.notify(row)
+
+    def remove(self, attrs):
+        if self.settings is not None:
+            raise Trap('no such command')
+        for row in self.find(attrs):
+            del self.rows[row[b'.id']]
+            self.index.pop(self.unique_key(row), None)
+            self.notify(collections.OrderedDict(
+                [(b'.id', row[b'.id']), (b'.dead', b'true')]))
+
+    def unique_key(self, row):
+        if not self.unique or not all(key in row for key in self.unique):
+            return None
+        return tuple(row[key] for key in self.unique)
+
+    def find(self, attrs):
+        ids = attrs.get(b'.id', attrs.get(b'numbers'))
+        if not ids:
+            raise Trap('no such item')
+        rows = []
+        for row_id in ids.split(b','):
+            row = self.rows.get(row_id)
+            if row is None:
+                raise Trap('no such item')
+            rows.append(row)
+        return rows
+
+    def notify(self, row):
+        for listener in list(self.listeners):
+            listener(row)
+
+
+def default_tables():
+    return {
+        b'/interface': Table(unique=('name',)),
+        b'/interface/ethernet': Table(unique=('name',)),
+        b'/interface/bridge': Table(unique=('name',)),
+        b'/ip/address': Table(unique=('address', 'interface')),
+        b'/ip/firewall/address-list': Table(unique=('list', 'address')),
+        b'/ip/firewall/filter': Table(),
+        b'/ip/firewall/nat': Table(),
+        b'/ppp/secret': Table(unique=('name',)),
+        b'/ip/dns': Table(settings={'servers': '', 'allow-remote-requests':
+                                    'false'}),
+        b'/system/identity': Table(settings={'name': 'MikroTik'}),
+    }
+
+
+def seed_row(path, index):
+    """Row number index of a seeded table, shaped like the real menu."""
+    if path == b'/ip/firewall/address-list':
+        return [(b'list', b'list-%d' % (index % 10)),
+                (b'address', b'10.%d.%d.%d' % (index >> 16 & 255,
+                                               index >> 8 & 255,
+                                               index & 255)),
+                (b'comment', b'seeded %d' % index),
+                (b'disabled', b'false'), (b'dynamic', b'false')]
+    if path == b'/ppp/secret':
+        return [(b'name', b'user%d' % index), (b'password', b'secret'),
+                (b'profile', b'default'), (b'service', b'any'),
+                (b'disabled', b'false')]
+    if path.startswith(b'/interface'):
+        return [(b'name', b'ether%d' % (index + 1)), (b'mtu', b'1500'),
+                (b'type', b'ether'), (b'running', b'true'),
+                (b'disabled', b'false')]
+    return [(b'name', b'item%d' % index), (b'comment', b'seeded %d' % index),
+            (b'disabled', b'false')]
+
+
+def compare(value, other):
+    """Order of two values, as numbers when both are."""
+    try:
+        value, other = int(value), int(other)
+    except ValueError:
+        pass
+    return (value > other) - (value < other)
+
+
+def matches(row, queries):
+    """Run the query words over row, the way the router's stack does."""
+    stack = []
+    for word in queries:
+        if word.startswith(b'?#'):
+            for operator in bytearray(word[2:]):
+                operator = chr(operator)
+                if operator == '!':
+                    stack.append(not stack.pop())
+                elif operator in '&|':
+                    right, left = stack.pop(), stack.pop()
+                    stack.append(left and right if operator == '&'
+                                 else left or right)
+                elif operator == '.':
+                    stack.append(stack[-1])
+                else:
+                    raise Trap('unknown query operator %s' % operator)
+            continue
+        test = word[1:2]
+        if test in (b'<', b'>'):
+            key, _, value = word[2:].partition(b'=')
+            if key not in row:
+                stack.append(False)
+            else:
+                order = compare(row[key], value)
+                stack.append(order < 0 if test == b'<' else order > 0)
+        elif test == b'-':
+            stack.append(word[2:] not in row)
+        elif b'=' in word:
+            key, _, value = word[1:].partition(b'=')
+            stack.append(row.get(key) == value)
+        else:
+            stack.append(word[1:] in row)
+    return all(stack)
+
+
+class Connection(object):
+    """One API session: a reader thread running commands and a writer
+    thread sending replies once their latency has passed."""
+
+    # rows per write of the reply to a tagged print
+    chunk = 1000
+
+    def __init__(self, router, sock):
+        self.router = router
+        self.socket = sock
+        self.buffer = b''
+        self.user = None
+        self.challenge = None
+        self.outbox = queue.Queue()
+        # tag -> cancel function of a running follow, listen or print
+        self.running = {}
+        self.closed = False
+
+    def start(self):
+        for target in (self.read_loop, self.write_loop):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+    def read_loop(self):
+        try:
+            while True:
+                words = self.read_sentence()
+                received = time.time()
+                with self.router.lock:
+                    self.router.stats['sentences_in'] += 1
+                    self.run(words, received)
+        except (EOFError, socket.error):
+            pass
+        finally:
+            self.close()
+
+    def write_loop(self):
+        while True:
+            due, data = self.outbox.get()
+            if data is None:
+                break
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            # a streamed print comes as an iterator of its chunks
+            chunks = [data] if isinstance(data, bytes) else data
+            try:
+                for chunk in chunks:
+                    self.socket.sendall(chunk)
+            except socket.error:
+                break
+        self.socket.close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        with self.router.lock:
+            for cancel in list(self.running.values()):
+                cancel()
+            self.running.clear()
+        self.outbox.put((0, None))
+
+    def recv(self, size):
+        while len(self.buffer) < size:
+            data = self.socket.recv(65536)
+            if not data:
+                raise EOFError()
+            with self.router.lock:
+                self.router.stats['bytes_in'] += len(data)
+            self.buffer += data
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def read_length(self):
+        first = bytearray(self.recv(1))[0]
+        if first < 0x80:
+            return first
+        if first == 0xF0:
+            return struct.unpack('>I', self.recv(4))[0]
+        for following, limit, mask in ((1, 0xC0, 0x3F), (2, 0xE0, 0x1F),
+                                       (3, 0xF0, 0x0F)):
+            if first < limit:
+                length = first & mask
+                for byte in bytearray(self.recv(following)):
+                    length = length << 8 | byte
+                return length
+        raise EOFError()
+
+    def read_sentence(self):
+        words = []
+        while True:
+            length = self.read_length()
+            if not length:
+                return words
+            words.append(self.recv(length))
+
+    def reply(self, words, tag, received):
+        self.reply_many([words], tag, received)
+
+    def reply_many(self, sentences, tag, received):
+        """Send sentences in one write, latency after received."""
+        suffix = [] if tag is None else [b'.tag=' + tag]
+        data = b''.join(encode_sentence(words + suffix)
+                        for words in sentences)
+        self.router.stats['sentences_out'] += len(sentences)
+        self.router.stats['bytes_out'] += len(data)
+        self.outbox.put((received + self.router.latency, data))
+
+    def trap(self, message, tag, received, category=None):
+        words = [b'!trap']
+        if category is not None:
+            words.append(b'=category=' + to_bytes(category))
+        self.reply(words + [b'=message=' + to_bytes(message)], tag, received)
+
+    def run(self, words, received):
+        if not words:
+            return
+        command = words[0]
+        attrs = collections.OrderedDict()
+        queries = []
+        tag = None
+        for word in words[1:]:
+            if word.startswith(b'.tag='):
+                tag = word[5:]
+            elif word.startswith(b'?'):
+                queries.append(word)
+            elif word.startswith(b'='):
+                key, _, value = word[1:].partition(b'=')
+                attrs[key] = value
+        try:
+            if command == b'/login':
+                self.login(attrs, tag, received)
+            elif self.user is None:
+                raise Trap('not logged in')
+            elif command == b'/cancel':
+                self.cancel(attrs, tag, received)
+            elif command == b'/quit':
+                self.reply([b'!fatal', b'session terminated on request'],
+                           None, received)
+                self.close()
+            else:
+                self.menu_command(command, attrs, queries, tag, received)
+        except Trap as e:
+            self.trap(e.message, tag, received, e.category)
+            self.reply([b'!done'], tag, received)
+
+    def login(self, attrs, tag, received):
+        users = self.router.users
+        name = attrs.get(b'name')
+        if b'response' in attrs and self.challenge is not None:
+            password = users.get(name)
+            expected = b'00' + binascii.hexlify(hashlib.md5(
+                b'\x00' + (password or b'') + self.challenge).digest())
+            if password is None or attrs[b'response'] != expected:
+                raise Trap('invalid user name or password (6)')
+        elif b'password' in attrs and self.router.login != 'md5':
+            if users.get(name) != attrs[b'password']:
+                raise Trap('invalid user name or password (6)')
+        elif self.router.login == 'plain-only':
+            # RouterOS 7 leaves the session logged out
+            self.reply([b'!done'], tag, received)
+            return
+        else:
+            self.challenge = os.urandom(16)
+            self.reply([b'!done', b'=ret=' + binascii.hexlify(
+                self.challenge)], tag, received)
+            return
+        self.user = name
+        self.router.stats['logins'] += 1
+        self.reply([b'!done'], tag, received)
+
+    def cancel(self, attrs, tag, received):
+        running = self.running.pop(attrs.get(b'tag'), None)
+        if running is None:
+            raise Trap('no such command or directory (tag)')
+        running()
+        self.trap('interrupted', attrs[b'tag'], received, category=2)
+        self.reply([b'!done'], attrs[b'tag'], received)
+        self.reply([b'!done'], tag, received)
+
+    def menu_command(self, command, attrs, queries, tag, received):
+        path, _, action = command.rpartition(b'/')
+        table = self.router.tables.get(path)
+        if table is None:
+            raise Trap('no such command prefix')
+        if action == b'print':
+            self.print_rows(table, attrs, queries, tag, received)
+            return
+        if action == b'listen':
+            self.follow(table, None, [], tag, received)
+            return
+        if action == b'add':
+            row_id = table.add(attrs)
+            self.reply([b'!done', b'=ret=' + row_id], tag, received)
+            return
+        if action == b'set':
+            table.set(attrs)
+        elif action == b'remove':
+            table.remove(attrs)
+        else:
+            raise Trap('no such command')
+        self.reply([b'!done'], tag, received)
+
+    def print_rows(self, table, attrs, queries, tag, received):
+        proplist = attrs.get(b'.proplist')
+        if proplist is not None:
+            proplist = proplist.split(b',')
+        if b'follow-only' in attrs:
+            self.follow(table, proplist, queries, tag, received)
+            return
+        rows = [row for row in table.items() if matches(row, queries)]
+        if b'count-only' in attrs:
+            self.reply([b'!done', b'=ret=%d' % len(rows)], tag, received)
+            return
+        sentences = [self.row_words(row, proplist) for row in rows]
+        if b'follow' in attrs:
+            self.reply_many(sentences, tag, received)
+            self.follow(table, proplist, queries, tag, received)
+            return
+        if tag is not None and len(sentences) > self.chunk:
+            self.stream(sentences, tag, received)
+            return
+        self.reply_many(sentences + [[b'!done']], tag, received)
+
+    def stream(self, sentences, tag, received):
+        """Send the reply of a tagged print chunk by chunk, so that a
+        /cancel arriving meanwhile stops it, like on a router."""
+        cancelled = []
+        self.running[tag] = lambda: cancelled.append(True)
+        suffix = [b'.tag=' + tag]
+
+        def chunks():
+            for start in range(0, len(sentences), self.chunk):
+                batch = sentences[start:start + self.chunk]
+                with self.router.lock:
+                    if cancelled:
+                        return
+                    if start + self.chunk >= len(sentences):
+                        self.running.pop(tag, None)
+                        batch.append([b'!done'])
+                    data = b''.join(encode_sentence(words + suffix)
+                                    for words in batch)
+                    self.router.stats['sentences_out'] += len(batch)
+                    self.router.stats['bytes_out'] += len(data)
+                yield data
+        self.outbox.put((received + self.router.latency, chunks()))
+
+    @staticmethod
+    def row_words(row, proplist):
+        return [b'!re'] + [b'=' + key + b'=' + value
+                           for key, value in row.items()
+                           if proplist is None or key in proplist or
+                           key == b'.dead']
+
+    def follow(self, table, proplist, queries, tag, received):
+        if tag is None:
+            raise Trap('follow and listen need a .tag')
+
+        def listener(row):
+            if b'.dead' in row or matches(row, queries):
+                self.reply(self.row_words(row, proplist), tag, time.time())
+
+        table.listeners.append(listener)
+        self.running[tag] = lambda: table.listeners.remove(listener)
+
+
+class FakeRouter(object):
+    """The fake API service, listening on host:port (a free port by
+    default) from start() until close().
+
+    latency is added before every reply. login is 'plain' for the login of
+    RouterOS 6.43 and later, 'plain-only' for RouterOS 7 which answers a
+    bare /login without a challenge, or 'md5' for the challenge only.
+    stats counts connections, logins, sentences and bytes in each
+    direction, and sessions keeps every Connection accepted.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, users=None, latency=0,
+                 login='plain', tables=None):
+        self.host = host
+        self.requested_port = port
+        self.users = dict((to_bytes(k), to_bytes(v)) for k, v in
+                          (users or {'admin': ''}).items())
+        self.latency = latency
+        self.login = login
+        self.tables = default_tables() if tables is None else tables
+        self.lock = threading.RLock()
+        self.stats = collections.Counter()
+        self.sessions = []
+        self.listener = None
+        self.port = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, _, __, ___):
+        self.close()
+
+    def start(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.requested_port))
+        self.listener.listen(128)
+        self.port = self.listener.getsockname()[1]
+        thread = threading.Thread(target=self.accept_loop)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def accept_loop(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except socket.error:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = Connection(self, sock)
+            with self.lock:
+                self.stats['connections'] += 1
+                self.sessions.append(session)
+            session.start()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+    def table(self, path, **options):
+        """The table of menu path, created empty if it is not there."""
+        path = to_bytes(path)
+        if path not in self.tables:
+            self.tables[path] = Table(**options)
+        return self.tables[path]
+
+    def seed(self, path, count, row=None):
+        """Add count rows to the table of path.
+
+        row(index) returns the (key, value) pairs of a row; by default
+        they are shaped like the menu's real rows.
+        """
+        path = to_bytes(path)
+        table = self.table(path)
+        with self.lock:
+            for index in range(count):
+                if row is None:
+                    attrs = seed_row(path, index)
+                else:
+                    attrs = [(to_bytes(k), to_bytes(v))
+                             for k, v in row(index)]
+                table.add(attrs, notify=False)
+        return table
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fake RouterOS API service for tests and benchmarks.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8728)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds added before every reply')
+    parser.add_argument('--login', choices=('plain', 'plain-only', 'md5'),
+                        default='plain')
+    parser.add_argument('--user', action='append', default=[],
+                        metavar='NAME:PASSWORD',
+                        help='user allowed to log in, admin with an empty '
+                        'password by default')
+    parser.add_argument('--seed', action='append', default=[],
+                        metavar='PATH=COUNT',
+                        help='add COUNT rows to the menu at PATH')
+    args = parser.parse_args()
+    users = dict(user.split(':', 1) for user in args.user) or None
+    router = FakeRouter(args.host, args.port, users=users,
+                        latency=args.latency, login=args.login)
+    for seed in args.seed:
+        path, _, count = seed.partition('=')
+        router.seed(path, int(count))
+    router.start()
+    print('listening on %s:%d' % (router.host, router.port))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        router.close()
+
+
+if __name__ == '__main__':
+    main()
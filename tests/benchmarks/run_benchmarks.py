@@ -0,0 +1,303 @@
+"""Run the mt_api protocol benchmarks and report them as JSON.
+
+Run: python tests/benchmarks/run_benchmarks.py [--output FILE]
+     [--baseline FILE] [--threshold 0.15] [--scale 0.1] [--filter NAME]
+
+Every benchmark replays canned wire bytes through a ReplaySocket, so no
+router or network is involved and the inputs are the same on every run:
+small sentences, a 1 MB word and a 500k row /print reply. For each one
+the best of --repeat wall times is kept and turned into a throughput,
+and one more run under tracemalloc (Python 3 only) records the peak
+memory allocated and how much of it the result still holds.
+
+Save a run with --output, then pass it as --baseline to a later run: any
+throughput that dropped or allocation that grew by more than --threshold
+is marked as a regression and the exit status is 1. No baseline is kept
+in the repository, the numbers only compare on one machine and Python,
+so record your own before making a change.
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+from common import ReplaySocket, encode_print_reply, encode_sentence, mt_api
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+LENGTHS = [
+    ('1b', 0x45),
+    ('2b', 0x1234),
+    ('3b', 0x12345),
+    ('4b', 0x1234567),
+    ('5b', 0x12345678),
+]
+SMALL_SENTENCE = [b'/interface/ethernet/set', b'=.id=*1', b'=mtu=1500',
+                  b'=comment=uplink', b'.tag=42']
+MEGABYTE = 1024 * 1024
+
+
+class Holder(object):
+    """The RouterboardAPI attributes a resource uses."""
+
+    def __init__(self, api_client):
+        self.api_client = api_client
+
+
+def length_encode(length, count):
+    length_to_bytes = mt_api.RosApiLengthUtils(None).length_to_bytes
+
+    def run():
+        for _ in range(count):
+            length_to_bytes(length)
+    return run
+
+
+def length_decode(length, count):
+    data = mt_api.RosApiLengthUtils(None).length_to_bytes(length) * count
+
+    def run():
+        read_length = mt_api.RosAPIReader(ReplaySocket(data)).read_length
+        for _ in range(count):
+            read_length()
+    return run
+
+
+def sentence_write(words, count):
+    def run():
+        sock = ReplaySocket()
+        api = mt_api.RosAPI(sock)
+        for _ in range(count):
+            api.write_sentence(words)
+        return sock
+    return run
+
+
+def sentence_read(words, count):
+    data = encode_sentence(words) * count
+
+    def run():
+        read_sentence = mt_api.RosAPIReader(ReplaySocket(data)).read_sentence
+        for _ in range(count):
+            read_sentence()
+    return run
+
+
+def sentence_parse(rows):
+    data = encode_print_reply(rows)
+
+    def run():
+        api = mt_api.RosAPI(ReplaySocket(data))
+        command = api.pending[None] = mt_api.RosAPICommand(api, None)
+        for reply, attrs in command:
+            attrs.get(b'.id')
+    return run
+
+
+def talk(rows):
+    data = encode_print_reply(rows)
+
+    def run():
+        return mt_api.RosAPI(ReplaySocket(data)).talk([b'/interface/print'])
+    return run
+
+
+def resource_encode(count):
+    resource = mt_api.RouterboardResource(Holder(None), '/interface')
+    kwargs = {'name': u'ether1', 'mtu': u'1500', 'comment': u'uplink'}
+
+    def run():
+        for _ in range(count):
+            resource._build_query('set', resource._encode_kwargs(kwargs),
+                                  resource._encode_kwargs({'id': u'*1'}))
+    return run
+
+
+def resource_decode(rows):
+    data = encode_print_reply(rows, tag=b'1')
+
+    def run():
+        api = mt_api.RosAPI(ReplaySocket(data))
+        resource = mt_api.RouterboardResource(Holder(api), '/interface')
+        return list(resource.iter_get())
+    return run
+
+
+def benchmarks(scale):
+    """(name, units per run, unit, setup) of every benchmark."""
+    def scaled(count):
+        return max(1, int(count * scale))
+
+    count = scaled(200000)
+    result = []
+    for label, length in LENGTHS:
+        result.append(('length.encode.%s' % label, count, 'lengths',
+                       lambda length=length: length_encode(length, count)))
+        result.append(('length.decode.%s' % label, count, 'lengths',
+                       lambda length=length: length_decode(length, count)))
+    small = scaled(100000)
+    big_words = [b'/file/set', b'=contents=' + b'x' * MEGABYTE]
+    big = scaled(20)
+    rows = scaled(500000)
+    result.extend([
+        ('sentence.write.small', small, 'sentences',
+         lambda: sentence_write(SMALL_SENTENCE, small)),
+        ('sentence.write.1mb_word', big * MEGABYTE, 'bytes',
+         lambda: sentence_write(big_words, big)),
+        ('sentence.read.small', small, 'sentences',
+         lambda: sentence_read(SMALL_SENTENCE, small)),
+        ('sentence.read.1mb_word', big * MEGABYTE, 'bytes',
+         lambda: sentence_read(big_words, big)),
+        ('sentence.parse.rows', small, 'rows', lambda: sentence_parse(small)),
+        ('talk.500k_rows', rows, 'rows', lambda: talk(rows)),
+        ('resource.encode', small, 'queries', lambda: resource_encode(small)),
+        ('resource.decode.500k_rows', rows, 'rows',
+         lambda: resource_decode(rows)),
+    ])
+    return result
+
+
+def measure(run, repeat):
+    """Best wall time of repeat runs, then the memory of one more."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.time()
+        result = run()
+        elapsed = time.time() - started
+        del result
+        if best is None or elapsed < best:
+            best = elapsed
+    if tracemalloc is None:
+        return best, None, None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return best, peak, retained
+
+
+def run_all(args):
+    results = {}
+    for name, units, unit, setup in benchmarks(args.scale):
+        if args.filter and not any(part in name for part in args.filter):
+            continue
+        seconds, peak, retained = measure(setup(), args.repeat)
+        results[name] = {
+            'units': units,
+            'unit': unit,
+            'seconds': seconds,
+            'throughput': units / seconds if seconds else None,
+            'peak_bytes': peak,
+            'retained_bytes': retained,
+        }
+        print('%-28s %14.1f %s/s' % (name, results[name]['throughput'] or 0,
+                                     unit), file=sys.stderr)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'repeat': args.repeat,
+        'memory': 'tracemalloc' if tracemalloc else None,
+        'results': results,
+    }
+
+
+def change(value, previous):
+    if value is None or not previous:
+        return None
+    return (value - previous) / float(previous)
+
+
+def compare(report, baseline, threshold):
+    """Changes against baseline and the names that regressed."""
+    comparison = {}
+    regressions = []
+    for name, result in sorted(report['results'].items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        changes = {
+            'throughput': change(result['throughput'],
+                                 previous['throughput']),
+            'peak_bytes': change(result['peak_bytes'],
+                                 previous['peak_bytes']),
+            'retained_bytes': change(result['retained_bytes'],
+                                     previous['retained_bytes']),
+        }
+        regressed = (
+            (changes['throughput'] or 0) < -threshold or
+            (changes['peak_bytes'] or 0) > threshold or
+            (changes['retained_bytes'] or 0) > threshold)
+        comparison[name] = dict(changes, regressed=regressed)
+        if regressed:
+            regressions.append(name)
+    return comparison, regressions
+
+
+def print_comparison(comparison, file):
+    def percent(value):
+        return '%+8.1f%%' % (value * 100) if value is not None else ' ' * 9
+
+    print('%-28s %9s %9s %9s' % ('benchmark', 'speed', 'peak', 'retained'),
+          file=file)
+    for name, changes in sorted(comparison.items()):
+        print('%-28s %s %s %s%s' % (
+            name, percent(changes['throughput']),
+            percent(changes['peak_bytes']),
+            percent(changes['retained_bytes']),
+            '  REGRESSION' if changes['regressed'] else ''), file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', help='write the JSON report here '
+                        'instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare with')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='relative change counted as a regression')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiply every input size, e.g. 0.1 for a '
+                        'quick run')
+    parser.add_argument('--filter', action='append', metavar='NAME',
+                        help='only run benchmarks whose name contains NAME')
+    args = parser.parse_args()
+
+    report = run_all(args)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ('python', 'scale'):
+            if baseline.get(key) != report[key]:
+                print('warning: baseline %s is %s, this run %s' % (
+                    key, baseline.get(key), report[key]), file=sys.stderr)
+        report['comparison'], regressions = compare(
+            report, baseline, args.threshold)
+        print_comparison(report['comparison'], sys.stderr)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Fixtures of the mt_api unit tests.
+
+The tests talk to a fake_routeros.FakeRouter on a free local port, with
+the host cache of mt_api in a directory of their own.
+"""
+import os
+import sys
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import pytest
+
+BENCHMARKS = os.path.join(os.path.dirname(__file__), '..', 'benchmarks')
+sys.path.insert(0, os.path.abspath(BENCHMARKS))
+
+from common import mt_api  # noqa: E402
+import fake_routeros  # noqa: E402
+from fake_routeros import FakeRouter  # noqa: E402
+
+# mt_api.aio is written with async/await
+collect_ignore = ['test_aio.py'] if sys.version_info < (3, 5) else []
+
+
+@pytest.fixture(autouse=True)
+def host_cache(tmpdir, monkeypatch):
+    """An empty host cache and circuit breaker for every test."""
+    monkeypatch.setenv('MT_API_CACHE_DIR', str(tmpdir))
+    mt_api.CircuitBreaker.states.clear()
+    return mt_api.HostCache()
+
+
+@pytest.fixture
+def router():
+    with FakeRouter() as router:
+        yield router
+
+
+@pytest.fixture
+def mikrotik(router):
+    """A Mikrotik logged in as admin on router, closed after the test."""
+    mk = mt_api.Mikrotik('127.0.0.1', 'admin', '', port=router.port)
+    mk.login()
+    yield mk
+    mk.close()
+
+
+@pytest.fixture
+def cut(monkeypatch):
+    """Sessions are cut on the nth command of an action: cut[b'add'] = 2
+    runs the second add, then closes the session without replying to it.
+    Replies queued before are still sent.
+    """
+    cuts = {}
+    menu_command = fake_routeros.Connection.menu_command
+
+    def cutting(self, command, attrs, queries, tag, received):
+        action = command.rpartition(b'/')[2]
+        if action in cuts:
+            cuts[action] -= 1
+            if not cuts[action]:
+                del cuts[action]
+                outbox, self.outbox = self.outbox, queue.Queue()
+                try:
+                    menu_command(self, command, attrs, queries, tag, received)
+                finally:
+                    self.outbox = outbox
+                raise EOFError()
+        menu_command(self, command, attrs, queries, tag, received)
+
+    monkeypatch.setattr(fake_routeros.Connection, 'menu_command', cutting)
+    return cuts
@@ -0,0 +1,42 @@
+"""The asyncio client against FakeRouter (user-006)."""
+import asyncio
+
+import pytest
+
+from common import mt_api
+from ansible.module_utils.mt_api.aio import AsyncRouterboardAPI
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+async def pending_tasks():
+    await asyncio.sleep(0.05)
+    all_tasks = getattr(asyncio, 'all_tasks', None) or asyncio.Task.all_tasks
+    current = asyncio.Task.current_task() if hasattr(
+        asyncio.Task, 'current_task') else asyncio.current_task()
+    return [task for task in all_tasks()
+            if task is not current and not task.done()]
+
+
+def test_get(router):
+    router.seed('/interface', 3)
+
+    async def interfaces():
+        async with AsyncRouterboardAPI('127.0.0.1', 'admin', '',
+                                       port=router.port) as api:
+            return await api.get_resource('/interface').get()
+
+    assert len(run(interfaces())) == 3
+
+
+def test_refused_login_closes_session(router):
+    api = AsyncRouterboardAPI('127.0.0.1', 'admin', 'wrong', port=router.port)
+    with pytest.raises(mt_api.RosAPIError) as error:
+        run(api.connect())
+    assert not isinstance(error.value, mt_api.RosAPIConnectionError)
+    assert 'invalid user name or password' in str(error.value)
+    assert api.api_client is None
+    # the dispatcher of the session was cancelled, nothing is left pending
+    assert run(pending_tasks()) == []
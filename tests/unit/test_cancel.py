@@ -0,0 +1,43 @@
+"""Cancelling tagged commands, the session staying usable after."""
+import pytest
+from ansible.module_utils._text import to_native
+
+from common import mt_api
+
+
+def test_deadline_cancels_command(router, mikrotik):
+    router.seed('/interface', 3)
+    # a follow never ends by itself
+    with pytest.raises(mt_api.RosAPITimeoutError):
+        mikrotik.talk([b'/interface/print', b'=follow='], timeout=0.2)
+    # the router got /cancel and the session is still good
+    assert not router.sessions[0].running
+    assert len(mikrotik.talk([b'/interface/print'])) == 4
+    assert not mikrotik.api.pending
+    assert router.stats['connections'] == 1
+
+
+def test_stopped_print_is_cancelled(router, mikrotik):
+    router.seed('/ip/firewall/address-list', 100000)
+    router.seed('/ppp/secret', 1)
+    rows = mikrotik.iter_print('/ip/firewall/address-list')
+    assert to_native(next(rows)[0]) == '!re'
+    rows.close()
+    secrets = mikrotik.api_print('/ppp/secret')
+    assert [to_native(reply) for reply, _ in secrets] == ['!re', '!done']
+    assert to_native(secrets[0][1][b'name']) == 'user0'
+    # the router stopped streaming instead of sending every row
+    assert router.stats['sentences_out'] < 10000
+
+
+def test_stopped_iter_talk_on_rosapi(router):
+    router.seed('/interface', 5000)
+    api = mt_api.RouterboardAPI('127.0.0.1', 'admin', port=router.port)
+    try:
+        replies = api.api_client.iter_talk([b'/interface/print'])
+        next(replies)
+        replies.close()
+        assert len(api.api_client.talk([b'/interface/print'])) == 5001
+        assert not api.api_client.pending
+    finally:
+        api.close_connection()
@@ -0,0 +1,96 @@
+"""Regression tests of the word length codec and the buffered reader.
+
+Every prefix width is encoded and decoded at both ends of its range,
+through RosApiLengthUtils and RosAPIReader, also when a ReplaySocket hands
+the bytes out a few at a time so a prefix is split across receives, and
+for words bigger than the reader's buffer.
+"""
+from common import ReplaySocket, encode_sentence, mt_api
+
+# (length, bytes of its prefix, first byte of the prefix)
+BOUNDARIES = [
+    (0, 1, 0x00),
+    (0x7F, 1, 0x7F),
+    (0x80, 2, 0x80),
+    (0x3FFF, 2, 0xBF),
+    (0x4000, 3, 0xC0),
+    (0x1FFFFF, 3, 0xDF),
+    (0x200000, 4, 0xE0),
+    (0xFFFFFFF, 4, 0xEF),
+    (0x10000000, 5, 0xF0),
+    (0xFFFFFFFF, 5, 0xF0),
+]
+SEGMENTS = (1, 2, 3, 7, 65536)
+
+
+def length_to_bytes(length):
+    return mt_api.RosApiLengthUtils(None).length_to_bytes(length)
+
+
+def test_encode_widths():
+    for length, width, first in BOUNDARIES:
+        prefix = length_to_bytes(length)
+        assert len(prefix) == width, (length, prefix)
+        assert bytearray(prefix)[0] == first, (length, prefix)
+
+
+def test_decode_length():
+    for length, _, _ in BOUNDARIES:
+        data = ReplaySocket(length_to_bytes(length))
+        decoded = mt_api.RosApiLengthUtils.decode_length(data.recv)
+        assert decoded == length, (length, decoded)
+
+
+def test_read_length_split():
+    data = b''.join(length_to_bytes(length) for length, _, _ in BOUNDARIES)
+    for segment in SEGMENTS:
+        reader = mt_api.RosAPIReader(ReplaySocket(data, segment=segment))
+        decoded = [reader.read_length() for _ in BOUNDARIES]
+        assert decoded == [length for length, _, _ in BOUNDARIES], segment
+
+
+def test_control_byte():
+    for first in (b'\xf1', b'\xf8', b'\xff'):
+        reader = mt_api.RosAPIReader(ReplaySocket(first))
+        try:
+            reader.read_length()
+        except mt_api.RosAPIFatalError:
+            continue
+        raise AssertionError('%r read as a length' % first)
+
+
+def words_of(data, spans):
+    return [data[spans[index]:spans[index + 1]]
+            for index in range(0, len(spans), 2)]
+
+
+def test_read_sentence_split():
+    # one word for each width a sentence can carry in memory
+    words = [b'!re', b'x' * 0x7F, b'y' * 0x80, b'z' * 0x4000,
+             b'w' * 0x200000, b'.tag=1']
+    data = encode_sentence(words) + encode_sentence([b'!done'])
+    for segment in SEGMENTS:
+        reader = mt_api.RosAPIReader(ReplaySocket(data, segment=segment))
+        assert words_of(*reader.read_sentence()) == words, segment
+        assert words_of(*reader.read_sentence()) == [b'!done'], segment
+
+
+def test_word_larger_than_buffer():
+    word = bytes(bytearray(range(256))) * 20
+    data = encode_sentence([b'!re', b'=contents=' + word, b'=size=5120'])
+    for segment in (1, 100, 65536):
+        # read_sentence() grows the buffer for it, then shrinks it back
+        reader = mt_api.RosAPIReader(ReplaySocket(data * 2, segment=segment),
+                                     buffer_size=1024)
+        for _ in range(2):
+            words = words_of(*reader.read_sentence())
+            assert words == [b'!re', b'=contents=' + word, b'=size=5120']
+        assert len(reader.buffer) == 1024
+        # read() receives it into its own bytes
+        reader = mt_api.RosAPIReader(ReplaySocket(data, segment=segment),
+                                     buffer_size=1024)
+        assert reader.read(reader.read_length()) == b'!re'
+        assert reader.read(reader.read_length()) == b'=contents=' + word
+        assert reader.read(reader.read_length()) == b'=size=5120'
+        assert reader.read_length() == 0
+
@@ -0,0 +1,58 @@
+"""Login methods and the cache of the one a router takes (user-008)."""
+import pytest
+
+from common import mt_api
+from fake_routeros import FakeRouter
+
+
+def login(router, password='', user='admin'):
+    mk = mt_api.Mikrotik('127.0.0.1', user, password, port=router.port)
+    try:
+        mk.login()
+    finally:
+        mk.close()
+    return router.stats['sentences_in']
+
+
+@pytest.mark.parametrize('method, sentences', [
+    ('plain', 1),
+    ('plain-only', 1),
+    # the plain /login is ignored and answered with the challenge
+    ('md5', 2),
+])
+def test_login_caches_method(host_cache, method, sentences):
+    with FakeRouter(login=method) as router:
+        assert login(router) == sentences
+        cached = 'md5' if method == 'md5' else 'plain'
+        assert host_cache.get('127.0.0.1', router.port, 'login') == cached
+        # the cached method logs in at once next time
+        router.stats.clear()
+        assert login(router) == sentences
+
+
+def test_stale_md5_falls_back_to_plain(host_cache):
+    with FakeRouter(login='plain-only') as router:
+        host_cache.set('127.0.0.1', router.port, 'login', 'md5')
+        # the bare /login gets no challenge, the plain one logs in
+        assert login(router) == 2
+        assert router.stats['logins'] == 1
+        assert host_cache.get('127.0.0.1', router.port, 'login') == 'plain'
+
+
+@pytest.mark.parametrize('method', ['plain', 'plain-only', 'md5'])
+@pytest.mark.parametrize('cached', [None, 'md5'])
+def test_wrong_password_reports_router_trap(host_cache, method, cached):
+    with FakeRouter(login=method) as router:
+        if cached:
+            host_cache.set('127.0.0.1', router.port, 'login', cached)
+        with pytest.raises(mt_api.RosAPIError) as error:
+            login(router, password='wrong')
+        assert not isinstance(error.value, mt_api.RosAPIConnectionError)
+        assert 'invalid user name or password' in str(error.value)
+        assert router.stats['logins'] == 0
+
+
+def test_trap_message_with_bytes_keys():
+    # the aio client raises the attrs of parse_sentence() as they are
+    error = mt_api.RosAPIError({b'message': b'no such command prefix'})
+    assert str(error) == 'no such command prefix'
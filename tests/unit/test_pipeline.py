@@ -0,0 +1,41 @@
+"""Traps and a dropped session in a pipeline, mapped to their commands."""
+import pytest
+from ansible.module_utils._text import to_native
+
+from common import mt_api
+
+
+def add(name):
+    return [b'/ppp/secret/add', b'=name=' + name]
+
+
+def test_trap_is_mapped_to_its_command(router, mikrotik):
+    router.seed('/ppp/secret', 1)
+    results = mikrotik.talk_pipelined([add(b'a'), add(b'user0'), add(b'b')])
+    assert isinstance(results[1], mt_api.RosAPIError)
+    assert not isinstance(results[1], mt_api.RosAPIConnectionError)
+    assert 'already have such entry' in str(results[1])
+    for replies in results[0], results[2]:
+        assert [to_native(reply) for reply, _ in replies] == ['!done']
+    assert len(router.tables[b'/ppp/secret']) == 3
+    # a trap leaves the session open
+    assert router.stats['connections'] == 1
+
+
+@pytest.mark.parametrize('window', [1, 64])
+def test_drop_is_mapped_to_unanswered_commands(router, cut, mikrotik,
+                                               window):
+    cut[b'add'] = 4
+    names = [b'u%d' % index for index in range(10)]
+    results = mikrotik.talk_pipelined([add(name) for name in names], window)
+    assert len(results) == 10
+    for replies in results[:3]:
+        assert [to_native(reply) for reply, _ in replies] == ['!done']
+    for result in results[3:]:
+        assert isinstance(result, mt_api.RosAPIConnectionError)
+    # the fourth add was run but not answered, so the caller has to read
+    # the table back to know; nothing is resent
+    assert len(router.tables[b'/ppp/secret']) == 4
+    assert mikrotik.api is None
+    assert len(mikrotik.api_print('/ppp/secret')) == 5
+    assert router.stats['connections'] == 2
@@ -0,0 +1,43 @@
+"""The ?# words compiled by mt_api.query, and the rows they select."""
+import pytest
+from ansible.module_utils._text import to_native
+
+from ansible.module_utils.mt_api.query import And, Key, Not, Or
+
+
+@pytest.mark.parametrize('query, words', [
+    (Key('dynamic') == True, [b'?dynamic=true']),  # noqa: E712
+    (Key('id') == '*1', [b'?.id=*1']),
+    (Key('dst_address') == '10.0.0.0/8', [b'?dst-address=10.0.0.0/8']),
+    (Key('mtu') != 1500, [b'?mtu=1500', b'?#!']),
+    (Key('mtu') < 1500, [b'?<mtu=1500']),
+    (Key('mtu') >= 1500, [b'?<mtu=1500', b'?#!']),
+    (Key('mtu') <= 1500, [b'?>mtu=1500', b'?#!']),
+    (Key('comment').has(), [b'?comment']),
+    (Key('comment').has_not(), [b'?-comment']),
+    (Key('name').is_in('a', 'b', 'c'),
+     [b'?name=a', b'?name=b', b'?#|', b'?name=c', b'?#|']),
+    ((Key('a') == 1) & (Key('b') == 2) | ~(Key('c') == 3),
+     [b'?a=1', b'?b=2', b'?#&', b'?c=3', b'?#!', b'?#|']),
+    (Not(And(Key('a') == 1, Or(Key('b') == 2, Key('c') == 3))),
+     [b'?a=1', b'?b=2', b'?c=3', b'?#|', b'?#&', b'?#!']),
+])
+def test_words(query, words):
+    assert list(query.words) == words
+
+
+def test_empty_combination():
+    with pytest.raises(ValueError):
+        Or()
+
+
+def test_router_runs_the_words(router, mikrotik):
+    router.seed('/ip/firewall/address-list', 100)
+    lists = Key('list').is_in('list-1', 'list-2')
+    query = lists & ~(Key('address') == '10.0.0.1')
+    replies = mikrotik.api_print('/ip/firewall/address-list', query=query)
+    rows = [row for reply, row in replies if to_native(reply) == '!re']
+    # ten rows in each list, 10.0.0.1 is in list-1
+    assert len(rows) == 19
+    assert set(to_native(row['list']) for row in rows) == \
+        set(['list-1', 'list-2'])
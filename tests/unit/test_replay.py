@@ -0,0 +1,39 @@
+"""Which commands Mikrotik.call() runs again on a new session."""
+import socket
+import time
+
+import pytest
+
+from common import mt_api
+
+
+def wait_closed(mikrotik):
+    deadline = time.time() + 5
+    while not mikrotik.api.peer_closed():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_dropped_add_is_not_replayed(router, cut, mikrotik):
+    cut[b'add'] = 1
+    with pytest.raises(mt_api.RosAPIConnectionError):
+        mikrotik.talk([b'/ppp/secret/add', b'=name=a'])
+    # the router ran it, a second add would make a duplicate
+    assert len(router.tables[b'/ppp/secret']) == 1
+    assert router.stats['connections'] == 1
+
+
+def test_dropped_print_is_replayed(router, cut, mikrotik):
+    router.seed('/ppp/secret', 3)
+    cut[b'print'] = 1
+    assert len(mikrotik.api_print('/ppp/secret')) == 4
+    assert router.stats['connections'] == 2
+
+
+def test_idle_session_is_reopened(router, mikrotik):
+    router.sessions[0].socket.shutdown(socket.SHUT_RDWR)
+    wait_closed(mikrotik)
+    mikrotik.talk([b'/ppp/secret/add', b'=name=a'])
+    assert len(router.tables[b'/ppp/secret']) == 1
+    assert router.stats['connections'] == 2
+
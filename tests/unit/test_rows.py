@@ -0,0 +1,52 @@
+"""Row and Replies access, for packed mappings and rows off the wire."""
+import pytest
+from ansible.module_utils._text import to_native
+
+from ansible.module_utils.mt_api.rows import Replies, Rows
+
+
+def test_rows_of_mappings():
+    rows = Rows([{'name': 'a', 'mtu': '1500'}, {'name': 'b'}])
+    assert len(rows) == 2
+    assert rows[0]['name'] == 'a'
+    assert rows[-1]['name'] == 'b'
+    # keys are found as text and as bytes
+    assert rows[0][b'mtu'] == '1500'
+    assert 'mtu' not in rows[1]
+    with pytest.raises(KeyError):
+        rows[1]['mtu']
+    assert rows[1].get('mtu') is None
+    assert sorted(rows[0]) == ['mtu', 'name']
+    assert len(rows[1]) == 1
+    assert rows == [{'name': 'a', 'mtu': '1500'}, {'name': 'b'}]
+    assert rows[1:] == [{'name': 'b'}]
+    with pytest.raises(IndexError):
+        rows[2]
+
+
+def test_replies_of_talk():
+    replies = Replies([('!re', {'name': 'a'}), ('!re', {'name': 'b'}),
+                       ('!done', {'ret': '*1'})])
+    assert len(replies) == 3
+    assert replies[0] == ('!re', {'name': 'a'})
+    assert replies[-1] == ('!done', {'ret': '*1'})
+    assert [reply for reply, _ in replies] == ['!re', '!re', '!done']
+    assert replies[1:] == [('!re', {'name': 'b'}), ('!done', {'ret': '*1'})]
+    with pytest.raises(IndexError):
+        replies[3]
+
+
+def test_replies_of_print(router, mikrotik):
+    # rows with different columns share one schema
+    router.seed('/interface', 2, row=lambda index: [('name', 'if%d' % index)] +
+                [('comment', 'second')] * index)
+    replies = mikrotik.api_print('/interface')
+    assert [to_native(reply) for reply, _ in replies] == ['!re', '!re', '!done']
+    first, second = replies[0][1], replies[1][1]
+    assert to_native(first['name']) == 'if0'
+    assert to_native(second[b'name']) == 'if1'
+    assert 'comment' not in first
+    assert to_native(second['comment']) == 'second'
+    assert set(to_native(key) for key in second) == \
+        set(['.id', 'name', 'comment'])
+    assert dict(first) == {b'.id': first[b'.id'], b'name': first[b'name']}